@@ -2,10 +2,79 @@ import brotli
 import time
 import os
 
+from dictionaries import get_dictionary
 
-def brotli_compress(input_data):
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_QUALITY = 11
+# Streaming is meant for large inputs, where quality 11 is far too slow
+DEFAULT_STREAM_QUALITY = 5
+DEFAULT_LGWIN = 22
+MODES = {
+    'generic': brotli.MODE_GENERIC,
+    'text': brotli.MODE_TEXT,
+    'font': brotli.MODE_FONT,
+}
+# Newer bindings can cap the output of a single Decompressor.process() call
+_HAS_OUTPUT_LIMIT = hasattr(brotli.Decompressor, 'can_accept_more_data')
+
+
+def _supports_dictionary():
+    # Both directions must take the keyword; the official binding (up to at least 1.2.0) takes neither
+    try:
+        brotli.Compressor(dictionary=b'\0')
+        brotli.Decompressor(dictionary=b'\0')
+    except TypeError:
+        return False
+    return True
+
+
+# Custom (shared) dictionaries are only exposed by some bindings
+_HAS_DICTIONARY = _supports_dictionary()
+
+
+def _dictionary_kwargs(dictionary_id):
+    if dictionary_id is None:
+        return {}
+    if not _HAS_DICTIONARY:
+        raise ValueError("The installed brotli binding does not support custom dictionaries")
+    return {'dictionary': get_dictionary(dictionary_id)}
+
+
+def brotli_compress_bytes(data, quality=DEFAULT_QUALITY, lgwin=DEFAULT_LGWIN, lgblock=0, mode='generic',
+                          dictionary_id=None):
+    """
+    Compress bytes-like data (bytes, bytearray, memoryview) using Brotli algorithm.
+    quality (0-11), lgwin (10-24), lgblock (0 or 16-24) and mode
+    ('generic', 'text' or 'font') are passed to the encoder.
+    dictionary_id selects a registered custom dictionary (see dictionaries.py).
+    Returns a dictionary with compressed bytes and statistics.
+    Raises ValueError if dictionary_id is given and the installed binding has no custom dictionary support.
+    """
+    start_time = time.time()
+
+    original_size = memoryview(data).nbytes
+    compressed_data = brotli.compress(data, mode=MODES[mode], quality=quality, lgwin=lgwin, lgblock=lgblock,
+                                      **_dictionary_kwargs(dictionary_id))
+    compressed_size = len(compressed_data)
+
+    compression_time = (time.time() - start_time) * 1000
+    compression_ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
+
+    return {
+        'compressed_bytes': compressed_data,
+        'compression_time': compression_time,
+        'original_size': original_size,
+        'compressed_size': compressed_size,
+        'compression_ratio': compression_ratio
+    }
+
+
+def brotli_compress(input_data, quality=DEFAULT_QUALITY, lgwin=DEFAULT_LGWIN, lgblock=0, mode='generic',
+                    dictionary_id=None):
     """
     Compress input data (string or file) using Brotli algorithm.
+    A path is read as raw bytes, any other string is UTF-8 encoded;
+    see brotli_compress_bytes for the parameters.
     Returns a dictionary with compression statistics.
     """
     start_time = time.time()
@@ -13,19 +82,117 @@ def brotli_compress(input_data):
     if os.path.isfile(input_data):
         with open(input_data, 'rb') as f:
             data = f.read()
-        original_size = os.path.getsize(input_data)
     else:
         data = input_data.encode('utf-8')
-        original_size = len(data)
 
-    compressed_data = brotli.compress(data)
-    compressed_size = len(compressed_data)
+    result = brotli_compress_bytes(data, quality, lgwin, lgblock, mode, dictionary_id)
+    # Reading the file is part of the measured time, as before
+    result['compression_time'] = (time.time() - start_time) * 1000
+    return result
+
+
+def brotli_decompress_bytes(compressed_data, dictionary_id=None):
+    """
+    Decompress bytes-like Brotli data.
+    Brotli streams do not name their dictionary, so dictionary_id must match the one used to compress.
+    Returns a dictionary with the decompressed bytes and statistics.
+    Raises ValueError for dictionary_id as brotli_compress_bytes does.
+    """
+    start_time = time.time()
+
+    decompressed_data = brotli.decompress(compressed_data, **_dictionary_kwargs(dictionary_id))
+
+    decompression_time = (time.time() - start_time) * 1000
+
+    return {
+        'decompressed_bytes': decompressed_data,
+        'decompression_time': decompression_time,
+        'compressed_size': memoryview(compressed_data).nbytes,
+        'decompressed_size': len(decompressed_data)
+    }
+
+
+def brotli_decompress(compressed_file, dictionary_id=None):
+    """
+    Decompress a Brotli-compressed file holding UTF-8 text.
+    Returns a dictionary with the decompressed text and statistics.
+    """
+    start_time = time.time()
+
+    with open(compressed_file, 'rb') as f:
+        compressed_data = f.read()
+
+    result = brotli_decompress_bytes(compressed_data, dictionary_id)
+    result['decompressed_text'] = result.pop('decompressed_bytes').decode('utf-8')
+    result['decompression_time'] = (time.time() - start_time) * 1000
+    return result
+
+
+def brotli_compress_stream(chunks, quality=DEFAULT_STREAM_QUALITY, lgwin=DEFAULT_LGWIN, lgblock=0, mode='generic',
+                           dictionary_id=None):
+    """
+    Compress an iterable of byte chunks with brotli.Compressor.
+    Yields compressed chunks as soon as the encoder produces them.
+    """
+    compressor = brotli.Compressor(mode=MODES[mode], quality=quality, lgwin=lgwin, lgblock=lgblock,
+                                   **_dictionary_kwargs(dictionary_id))
+    for chunk in chunks:
+        compressed = compressor.process(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+def brotli_decompress_stream(chunks, chunk_size=DEFAULT_CHUNK_SIZE, dictionary_id=None):
+    """
+    Decompress an iterable of Brotli chunks with brotli.Decompressor.
+    Yields decompressed chunks; where the binding supports it each one is
+    capped at chunk_size bytes.
+    """
+    decompressor = brotli.Decompressor(**_dictionary_kwargs(dictionary_id))
+    for chunk in chunks:
+        if _HAS_OUTPUT_LIMIT:
+            data = decompressor.process(chunk, output_buffer_limit=chunk_size)
+            if data:
+                yield data
+            while not decompressor.can_accept_more_data():
+                data = decompressor.process(b'', output_buffer_limit=chunk_size)
+                if data:
+                    yield data
+        else:
+            data = decompressor.process(chunk)
+            if data:
+                yield data
+    # Drain output still buffered after the last input chunk
+    while _HAS_OUTPUT_LIMIT and not decompressor.is_finished():
+        data = decompressor.process(b'', output_buffer_limit=chunk_size)
+        if not data:
+            break
+        yield data
+    if not decompressor.is_finished():
+        raise brotli.error("Compressed stream is truncated")
+
+
+def brotli_compress_file(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE, quality=DEFAULT_STREAM_QUALITY,
+                         lgwin=DEFAULT_LGWIN, lgblock=0, mode='generic', dictionary_id=None):
+    """
+    Compress a file into another file chunk by chunk in bounded memory.
+    Returns a dictionary with compression statistics.
+    """
+    start_time = time.time()
+
+    compressed_size = 0
+    with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+        chunks = iter(lambda: source.read(chunk_size), b'')
+        for compressed in brotli_compress_stream(chunks, quality, lgwin, lgblock, mode, dictionary_id):
+            compressed_size += len(compressed)
+            target.write(compressed)
 
     compression_time = (time.time() - start_time) * 1000
+    original_size = os.path.getsize(input_file)
     compression_ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
 
     return {
-        'compressed_bytes': compressed_data,
         'compression_time': compression_time,
         'original_size': original_size,
         'compressed_size': compressed_size,
@@ -33,25 +200,24 @@ def brotli_compress(input_data):
     }
 
 
-def brotli_decompress(compressed_file):
+def brotli_decompress_file(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE, dictionary_id=None):
     """
-    Decompress a Brotli-compressed file.
-    Returns a dictionary with the decompressed text and statistics.
+    Decompress a Brotli-compressed file into another file chunk by chunk.
+    Returns a dictionary with decompression statistics.
     """
     start_time = time.time()
 
-    with open(compressed_file, 'rb') as f:
-        compressed_data = f.read()
-
-    decompressed_data = brotli.decompress(compressed_data)
-    decompressed_text = decompressed_data.decode('utf-8')
+    decompressed_size = 0
+    with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+        chunks = iter(lambda: source.read(chunk_size), b'')
+        for data in brotli_decompress_stream(chunks, chunk_size, dictionary_id):
+            decompressed_size += len(data)
+            target.write(data)
 
     decompression_time = (time.time() - start_time) * 1000
-    compressed_size = os.path.getsize(compressed_file)
-    decompressed_size = len(decompressed_data)
+    compressed_size = os.path.getsize(input_file)
 
     return {
-        'decompressed_text': decompressed_text,
         'decompression_time': decompression_time,
         'compressed_size': compressed_size,
         'decompressed_size': decompressed_size
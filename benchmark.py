@@ -0,0 +1,95 @@
+import argparse
+import time
+
+from codec import available_codecs, get_codec, parse_params
+
+DEFAULT_REPEATS = 3
+
+
+def _best_time(function, data, repeats):
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        result = function(data)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def benchmark_codec(codec, data, repeats=DEFAULT_REPEATS, label=None):
+    """
+    Measure one codec on one input: the best of repeats runs in each direction.
+    label names the row in the results (default: the codec name).
+    Raises ValueError if the round trip does not restore the data.
+    Returns a dictionary with sizes, ratio, times (ms) and throughput (MB/s).
+    """
+    compressed, compression_time = _best_time(codec.compress, data, repeats)
+    decompressed, decompression_time = _best_time(codec.decompress, compressed, repeats)
+    if decompressed != data:
+        raise ValueError(f"{codec.name}: round trip does not restore the input")
+
+    original_size = len(data)
+    megabytes = original_size / (1024 * 1024)
+    return {
+        'codec': label or codec.name,
+        'original_size': original_size,
+        'compressed_size': len(compressed),
+        'compression_ratio': (original_size - len(compressed)) / original_size * 100 if original_size > 0 else 0,
+        'compression_time': compression_time * 1000,
+        'decompression_time': decompression_time * 1000,
+        'compression_speed': megabytes / compression_time if compression_time > 0 else 0,
+        'decompression_speed': megabytes / decompression_time if decompression_time > 0 else 0,
+    }
+
+
+def run_benchmark(data, codecs, repeats=DEFAULT_REPEATS):
+    """
+    Benchmark every codec instance in codecs on data; returns one result per codec.
+    Items may also be (label, codec) pairs, e.g. to compare levels of one codec.
+    """
+    results = []
+    for item in codecs:
+        label, codec = item if isinstance(item, tuple) else (None, item)
+        results.append(benchmark_codec(codec, data, repeats, label))
+    return results
+
+
+def parse_codec_spec(spec):
+    """Split 'lz77:level=3:window_size=1023' into the codec name and its parameter items."""
+    name, _, rest = spec.partition(':')
+    return name, rest.split(':') if rest else []
+
+
+def print_results(results):
+    width = max([10] + [len(result['codec']) + 2 for result in results])
+    print(f"{'codec':<{width}}{'size':>12}{'ratio %':>10}{'comp MB/s':>12}{'decomp MB/s':>13}")
+    for result in results:
+        print(f"{result['codec']:<{width}}{result['compressed_size']:>12}{result['compression_ratio']:>10.2f}"
+              f"{result['compression_speed']:>12.2f}{result['decompression_speed']:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the registered codecs on the same input")
+    parser.add_argument("input_file")
+    parser.add_argument("--codecs", default=",".join(available_codecs()),
+                        help="comma-separated codec names, each optionally with parameters, "
+                             "e.g. lz77:level=1,lz77:level=5 (default: all)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="CODEC.NAME=VALUE",
+                        help="codec parameter, e.g. -p deflate.level=6 -p lz77.match_finder=binary_tree")
+    args = parser.parse_args()
+
+    params = {}
+    for codec_name, item in (param.split('.', 1) for param in args.param):
+        params.setdefault(codec_name, []).append(item)
+
+    with open(args.input_file, 'rb') as f:
+        data = f.read()
+
+    codecs = []
+    for spec in args.codecs.split(','):
+        name, items = parse_codec_spec(spec)
+        codec = get_codec(name, **parse_params(params.get(name, []) + items))
+        codecs.append((spec, codec))
+    print(f"Input: {args.input_file}, {len(data)} bytes")
+    print_results(run_benchmark(data, codecs, args.repeats))
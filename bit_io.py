@@ -0,0 +1,94 @@
+class BitWriter:
+    """
+    Записывает битовые поля старшим битом вперёд.
+    Биты накапливаются в целом числе и сбрасываются в bytearray целыми байтами,
+    поэтому стоимость записи зависит от числа полей, а не от числа битов.
+    """
+
+    FLUSH_THRESHOLD = 64
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._acc = 0
+        self._count = 0
+
+    def write(self, value, bit_count):
+        """Дописывает младшие bit_count бит значения value."""
+        self._acc = (self._acc << bit_count) | value
+        self._count += bit_count
+        if self._count >= self.FLUSH_THRESHOLD:
+            self._flush()
+
+    def _flush(self):
+        full_bytes = self._count >> 3
+        rest = self._count & 7
+        self.buffer += (self._acc >> rest).to_bytes(full_bytes, 'big')
+        self._acc &= (1 << rest) - 1
+        self._count = rest
+
+    def bit_length(self):
+        """Количество записанных битов."""
+        return len(self.buffer) * 8 + self._count
+
+    def getvalue(self):
+        """Возвращает записанные данные, дополненные нулями до целого байта."""
+        self._flush()
+        result = bytearray(self.buffer)
+        if self._count:
+            result.append((self._acc << (8 - self._count)) & 0xFF)
+        return result
+
+
+class BitReader:
+    """
+    Читает битовые поля старшим битом вперёд из bytes/bytearray/memoryview.
+    Данные подгружаются в целочисленный аккумулятор по несколько байтов за раз.
+    """
+
+    REFILL_BYTES = 8
+
+    def __init__(self, data):
+        self._data = data
+        self._pos = 0
+        self._acc = 0
+        self._count = 0
+
+    def _refill(self, bit_count):
+        data = self._data
+        while self._count < bit_count and self._pos < len(data):
+            chunk = data[self._pos:self._pos + self.REFILL_BYTES]
+            self._pos += len(chunk)
+            self._acc = (self._acc << (8 * len(chunk))) | int.from_bytes(chunk, 'big')
+            self._count += 8 * len(chunk)
+
+    def bits_left(self):
+        """Количество ещё не прочитанных битов."""
+        return self._count + 8 * (len(self._data) - self._pos)
+
+    def peek(self, bit_count):
+        """Возвращает следующие bit_count бит, не сдвигая позицию; за концом данных — нули."""
+        if self._count < bit_count:
+            self._refill(bit_count)
+        if self._count >= bit_count:
+            return self._acc >> (self._count - bit_count)
+        return self._acc << (bit_count - self._count)
+
+    def skip(self, bit_count):
+        """Пропускает bit_count бит."""
+        if self._count < bit_count:
+            self._refill(bit_count)
+            if self._count < bit_count:
+                raise EOFError("Недостаточно данных в битовом потоке")
+        self._count -= bit_count
+        self._acc &= (1 << self._count) - 1
+
+    def read(self, bit_count):
+        """Читает bit_count бит как беззнаковое целое."""
+        if self._count < bit_count:
+            self._refill(bit_count)
+            if self._count < bit_count:
+                raise EOFError("Недостаточно данных в битовом потоке")
+        self._count -= bit_count
+        value = self._acc >> self._count
+        self._acc &= (1 << self._count) - 1
+        return value
@@ -0,0 +1,51 @@
+import threading
+from queue import Queue, Full
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+READ_AHEAD_DEPTH = 4
+
+
+def read_chunks(file, chunk_size=DEFAULT_CHUNK_SIZE, read_ahead=READ_AHEAD_DEPTH):
+    """
+    Yield chunks of a binary file object.
+    With read_ahead > 0 a background thread keeps up to read_ahead chunks
+    queued, so disk reads overlap with (GIL-releasing) compression work.
+    """
+    if read_ahead <= 0:
+        yield from iter(lambda: file.read(chunk_size), b'')
+        return
+
+    queue = Queue(maxsize=read_ahead)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            while True:
+                chunk = file.read(chunk_size)
+                if not put(chunk) or not chunk:
+                    return
+        except Exception as e:
+            put(e)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = queue.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
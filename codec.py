@@ -0,0 +1,371 @@
+import argparse
+import ast
+import os
+import time
+from abc import ABC, abstractmethod
+
+import BrotliComp
+import deflate
+import huffman_coding
+import lz77
+from chunk_io import DEFAULT_CHUNK_SIZE, read_chunks
+from dictionaries import load_dictionary
+
+# LZ77 has no format defaults of its own: 12-bit offsets and 8-bit lengths
+DEFAULT_LZ77_WINDOW_SIZE = 4095
+DEFAULT_LZ77_BUFFER_SIZE = 255
+
+_registry = {}
+
+
+def register_codec(cls):
+    """Class decorator that makes a Codec subclass available by its name."""
+    _registry[cls.name] = cls
+    return cls
+
+
+def get_codec(name, **params):
+    """Create the codec registered under name with the given parameters."""
+    try:
+        cls = _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name}")
+    return cls(**params)
+
+
+def available_codecs():
+    """Names of all registered codecs."""
+    return list(_registry)
+
+
+class Codec(ABC):
+    """
+    Common interface of the compression algorithms.
+    Parameters are fixed when a codec is created. Subclasses must implement
+    compress/decompress on bytes-like data and override the stream methods
+    when the algorithm can work incrementally; statistics and file handling
+    are implemented here once for every codec.
+    """
+
+    name = None
+    extension = None
+    # True when compress_stream/decompress_stream run in bounded memory
+    streaming = False
+
+    @abstractmethod
+    def compress(self, data):
+        """Compress bytes-like data and return the compressed bytes."""
+
+    @abstractmethod
+    def decompress(self, data):
+        """Decompress bytes-like data and return the original bytes."""
+
+    def params(self):
+        """Parameters the codec was created with; by convention they are its attributes."""
+        return dict(vars(self))
+
+    def block_boundary(self, data, end):
+        """Where to end a block that would end at end; codecs that cannot split anywhere move it back."""
+        return end
+
+    def compress_stream(self, chunks):
+        """Yield compressed chunks for an iterable of byte chunks."""
+        yield self.compress(b''.join(chunks))
+
+    def decompress_stream(self, chunks):
+        """Yield decompressed chunks for an iterable of compressed chunks."""
+        yield self.decompress(b''.join(chunks))
+
+    def compress_with_stats(self, data):
+        """
+        Compress data and measure it.
+        Returns a dictionary with compressed bytes and statistics (time in ms).
+        """
+        start_time = time.perf_counter()
+        compressed = self.compress(data)
+        compression_time = (time.perf_counter() - start_time) * 1000
+        return _compression_stats(memoryview(data).nbytes, len(compressed), compression_time,
+                                  compressed_bytes=compressed)
+
+    def decompress_with_stats(self, data):
+        """
+        Decompress data and measure it.
+        Returns a dictionary with decompressed bytes and statistics (time in ms).
+        """
+        start_time = time.perf_counter()
+        decompressed = self.decompress(data)
+        decompression_time = (time.perf_counter() - start_time) * 1000
+        return _decompression_stats(memoryview(data).nbytes, len(decompressed), decompression_time,
+                                    decompressed_bytes=decompressed)
+
+    def compress_text(self, text):
+        """Compress a string as UTF-8; see compress_with_stats."""
+        return self.compress_with_stats(text.encode('utf-8'))
+
+    def decompress_text(self, data):
+        """Decompress data holding UTF-8 text; adds 'decompressed_text' to the statistics."""
+        result = self.decompress_with_stats(data)
+        result['decompressed_text'] = result.pop('decompressed_bytes').decode('utf-8')
+        return result
+
+    def compress_file(self, input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """
+        Compress a file into another file through compress_stream.
+        progress(done, total) is called with input bytes consumed (see track_progress).
+        Returns a dictionary with compression statistics.
+        """
+        start_time = time.perf_counter()
+        compressed_size = 0
+        with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+            chunks = track_progress(read_chunks(source, chunk_size), os.path.getsize(input_file), progress)
+            for compressed in self.compress_stream(chunks):
+                compressed_size += len(compressed)
+                target.write(compressed)
+        compression_time = (time.perf_counter() - start_time) * 1000
+        return _compression_stats(os.path.getsize(input_file), compressed_size, compression_time)
+
+    def decompress_file(self, input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+        """
+        Decompress a file into another file through decompress_stream.
+        progress(done, total) is called with compressed bytes consumed (see track_progress).
+        Returns a dictionary with decompression statistics.
+        """
+        start_time = time.perf_counter()
+        decompressed_size = 0
+        with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+            chunks = track_progress(read_chunks(source, chunk_size), os.path.getsize(input_file), progress)
+            for data in self.decompress_stream(chunks):
+                decompressed_size += len(data)
+                target.write(data)
+        decompression_time = (time.perf_counter() - start_time) * 1000
+        return _decompression_stats(os.path.getsize(input_file), decompressed_size, decompression_time)
+
+
+def track_progress(chunks, total, progress=None):
+    """
+    Pass chunks through, calling progress(done, total) with the bytes seen so far.
+    An exception raised by progress stops the operation, which is how callers cancel it.
+    """
+    if progress is None:
+        yield from chunks
+        return
+    done = 0
+    progress(done, total)
+    for chunk in chunks:
+        done += len(chunk)
+        yield chunk
+        progress(done, total)
+
+
+def _compression_stats(original_size, compressed_size, compression_time, **extra):
+    compression_ratio = (original_size - compressed_size) / original_size * 100 if original_size > 0 else 0
+    return dict(extra, original_size=original_size, compressed_size=compressed_size,
+                compression_ratio=compression_ratio, compression_time=compression_time)
+
+
+def _decompression_stats(compressed_size, decompressed_size, decompression_time, **extra):
+    return dict(extra, compressed_size=compressed_size, decompressed_size=decompressed_size,
+                decompression_time=decompression_time)
+
+
+@register_codec
+class HuffmanCodec(Codec):
+    """
+    Canonical Huffman coding (huffman_coding.py). mode='bytes' codes raw bytes;
+    mode='text' codes Unicode characters of UTF-8 input, as the old .huff files of the GUI.
+    Streams use the block format of huffman_coding.compress_stream, with one code
+    table per huffman_coding.DEFAULT_BLOCK_SIZE symbols, so files are compressed in bounded memory.
+    """
+
+    name = 'huffman'
+    extension = '.huff'
+    streaming = True
+
+    def __init__(self, max_code_length=huffman_coding.DEFAULT_MAX_CODE_LENGTH, mode='bytes'):
+        if mode not in ('text', 'bytes'):
+            raise ValueError(f"Unknown Huffman mode: {mode}")
+        self.max_code_length = max_code_length
+        self.mode = mode
+
+    def block_boundary(self, data, end):
+        # In text mode every block must be valid UTF-8: do not cut a character
+        if self.mode == 'text':
+            while end > 0 and end < len(data) and data[end] & 0xC0 == 0x80:
+                end -= 1
+        return end
+
+    def compress(self, data):
+        if self.mode == 'text':
+            return huffman_coding.encode_block(str(data, 'utf-8'), self.max_code_length)
+        return huffman_coding.compress_bytes(data, self.max_code_length)
+
+    def decompress(self, data):
+        if self.mode == 'text':
+            return huffman_coding.decode_block(data).encode('utf-8')
+        return huffman_coding.decompress_bytes(data)
+
+    def compress_stream(self, chunks):
+        return huffman_coding.compress_stream(chunks, max_code_length=self.max_code_length, mode=self.mode)
+
+    def decompress_stream(self, chunks):
+        # Старые файлы без заголовка потока — один блок в режиме кодека
+        return huffman_coding.decompress_stream(chunks, self.mode)
+
+
+@register_codec
+class LZ77Codec(Codec):
+    """
+    LZ77 triples (lz77.py); window_size and buffer_size must match on both sides.
+    level (see lz77.COMPRESSION_LEVELS) overrides match_finder, max_chain_depth and parse.
+    The format has no block structure, so compress_file holds the whole file in
+    memory; container.pack_file is the streaming path for large files.
+    """
+
+    name = 'lz77'
+    extension = '.lz77'
+
+    def __init__(self, window_size=DEFAULT_LZ77_WINDOW_SIZE, buffer_size=DEFAULT_LZ77_BUFFER_SIZE,
+                 match_finder='hash_chain', max_chain_depth=lz77.DEFAULT_MAX_CHAIN_DEPTH, parse='greedy',
+                 level=None):
+        if level is not None:
+            settings = lz77.level_settings(level)
+            match_finder = settings['match_finder']
+            max_chain_depth = settings['max_chain_depth']
+            parse = settings['parse']
+        self.window_size = window_size
+        self.buffer_size = buffer_size
+        self.match_finder = match_finder
+        self.max_chain_depth = max_chain_depth
+        self.parse = parse
+        self.level = level
+
+    def compress(self, data):
+        return lz77.lz77_compress_bytes(data, self.window_size, self.buffer_size, self.match_finder,
+                                        self.max_chain_depth, self.parse)['compressed_bytes']
+
+    def decompress(self, data):
+        return lz77.lz77_decompress_bytes(data, self.window_size, self.buffer_size)['decompressed_bytes']
+
+
+@register_codec
+class DeflateCodec(Codec):
+    """DEFLATE through zlib (deflate.py); see deflate_compress_bytes for the parameters."""
+
+    name = 'deflate'
+    extension = '.deflate'
+    streaming = True
+
+    def __init__(self, level=deflate.DEFAULT_LEVEL, wbits=deflate.DEFAULT_WBITS, mem_level=deflate.zlib.DEF_MEM_LEVEL,
+                 strategy=deflate.zlib.Z_DEFAULT_STRATEGY, workers=1, dictionary_id=None):
+        self.level = level
+        self.wbits = wbits
+        self.mem_level = mem_level
+        self.strategy = strategy
+        self.workers = workers
+        self.dictionary_id = dictionary_id
+
+    def _decompress_wbits(self):
+        # zlib and gzip are recognised by their headers, raw streams are not
+        return self.wbits if self.wbits < 0 else deflate.AUTO_DETECT_WBITS
+
+    def compress(self, data):
+        return deflate.deflate_compress_bytes(data, self.level, self.wbits, self.mem_level, self.strategy,
+                                              self.workers, self.dictionary_id)['compressed_bytes']
+
+    def decompress(self, data):
+        return deflate.deflate_decompress_bytes(data, self._decompress_wbits(), self.dictionary_id)['decompressed_bytes']
+
+    def compress_stream(self, chunks):
+        if self.workers > 1:
+            return deflate.deflate_compress_parallel_stream(chunks, self.level, self.wbits, self.mem_level,
+                                                            self.strategy, workers=self.workers,
+                                                            dictionary_id=self.dictionary_id)
+        return deflate.deflate_compress_stream(chunks, self.level, self.wbits, self.mem_level, self.strategy,
+                                               self.dictionary_id)
+
+    def decompress_stream(self, chunks):
+        return deflate.deflate_decompress_stream(chunks, wbits=self._decompress_wbits(),
+                                                 dictionary_id=self.dictionary_id)
+
+
+@register_codec
+class BrotliCodec(Codec):
+    """
+    Brotli (BrotliComp.py). Without an explicit quality one-shot compression
+    uses DEFAULT_QUALITY and streaming the faster DEFAULT_STREAM_QUALITY.
+    """
+
+    name = 'brotli'
+    extension = '.br'
+    streaming = True
+
+    def __init__(self, quality=None, lgwin=BrotliComp.DEFAULT_LGWIN, lgblock=0, mode='generic', dictionary_id=None):
+        self.quality = quality
+        self.lgwin = lgwin
+        self.lgblock = lgblock
+        self.mode = mode
+        self.dictionary_id = dictionary_id
+
+    def compress(self, data):
+        quality = BrotliComp.DEFAULT_QUALITY if self.quality is None else self.quality
+        return BrotliComp.brotli_compress_bytes(data, quality, self.lgwin, self.lgblock, self.mode,
+                                                self.dictionary_id)['compressed_bytes']
+
+    def decompress(self, data):
+        return BrotliComp.brotli_decompress_bytes(data, self.dictionary_id)['decompressed_bytes']
+
+    def compress_stream(self, chunks):
+        quality = BrotliComp.DEFAULT_STREAM_QUALITY if self.quality is None else self.quality
+        return BrotliComp.brotli_compress_stream(chunks, quality, self.lgwin, self.lgblock, self.mode,
+                                                 self.dictionary_id)
+
+    def decompress_stream(self, chunks):
+        return BrotliComp.brotli_decompress_stream(chunks, dictionary_id=self.dictionary_id)
+
+
+def parse_params(items):
+    """Turn ['level=6', 'mode=text'] into codec parameters; values are Python literals or plain strings."""
+    params = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Parameter must look like name=value: {item}")
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return params
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compress or decompress a file with any registered codec")
+    parser.add_argument("codec", choices=available_codecs())
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("-d", "--decompress", action="store_true", help="decompress instead of compress")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="codec parameter, e.g. -p level=6 -p workers=4")
+    parser.add_argument("--dictionary", help="preset dictionary file for deflate/brotli (see dictionaries.py); "
+                                             "sets -p dictionary_id")
+    args = parser.parse_args()
+
+    params = parse_params(args.param)
+    if args.dictionary:
+        params.setdefault('dictionary_id', load_dictionary(args.dictionary))
+    try:
+        codec = get_codec(args.codec, **params)
+    except TypeError:
+        parser.error(f"unsupported parameters for {args.codec}: {', '.join(params)}")
+    if args.decompress:
+        result = codec.decompress_file(args.input_file, args.output_file)
+        print(f"Decompression successful: {args.input_file} -> {args.output_file}")
+        print(f"Compressed size: {result['compressed_size']} bytes")
+        print(f"Decompressed size: {result['decompressed_size']} bytes")
+        print(f"Time: {result['decompression_time']:.2f} ms")
+    else:
+        result = codec.compress_file(args.input_file, args.output_file)
+        print(f"Compression successful: {args.input_file} -> {args.output_file}")
+        print(f"Original size: {result['original_size']} bytes")
+        print(f"Compressed size: {result['compressed_size']} bytes")
+        print(f"Compression ratio: {result['compression_ratio']:.2f}%")
+        print(f"Time: {result['compression_time']:.2f} ms")
@@ -0,0 +1,436 @@
+import argparse
+import bisect
+import io
+import json
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from codec import DEFAULT_CHUNK_SIZE, available_codecs, get_codec, parse_params, track_progress
+from dictionaries import load_dictionary, register_dictionaries, registered_dictionaries
+
+# Layout (all integers big-endian):
+#   header:  MAGIC, version (1), codec name length (1), codec name,
+#            parameters length (2), parameters as JSON, block size (4), original size (8)
+#   blocks:  original length (4), compressed length (4), CRC32 of the original data (4), payload
+#   end:     an all-zero block frame
+#   index:   per block — offset of its frame (8), offset of its data in the original (8)
+#   footer:  index offset (8), block count (4), FOOTER_MAGIC
+# Every block is compressed on its own, so any of them can be decoded from the index alone.
+MAGIC = b'CAC\x00'
+FOOTER_MAGIC = b'CACi'
+VERSION = 1
+DEFAULT_BLOCK_SIZE = 1 << 20
+# Frames store block lengths in 32 bits; half of that range leaves room for
+# codecs that expand incompressible blocks
+MAX_BLOCK_SIZE = 1 << 31
+UNKNOWN_SIZE = (1 << 64) - 1
+# Blocks per worker process in one shared-memory batch; more evens out slow blocks
+PARALLEL_BLOCKS_PER_WORKER = 4
+
+_HEADER_END = struct.Struct('>IQ')
+_FRAME = struct.Struct('>III')
+_INDEX_ENTRY = struct.Struct('>QQ')
+_FOOTER = struct.Struct('>QI4s')
+
+
+def _read_exact(file, size):
+    data = file.read(size)
+    if len(data) < size:
+        raise ValueError("Container is truncated")
+    return data
+
+
+def _compress_shared_block(shm_name, start, end, codec):
+    """Worker process: compress one block straight from the shared-memory batch."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with shm.buf[start:end] as block:
+            return codec.compress(block), zlib.crc32(block)
+    finally:
+        shm.close()
+
+
+def is_container(path):
+    """True if the file starts with the container magic number."""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class ContainerWriter:
+    """
+    Writes data to a binary file object as a container of independently
+    compressed blocks. Use as a context manager or call close().
+    """
+
+    def __init__(self, file, codec, block_size=DEFAULT_BLOCK_SIZE):
+        if not 0 < block_size <= MAX_BLOCK_SIZE:
+            raise ValueError(f"Block size must be between 1 and {MAX_BLOCK_SIZE} bytes, got {block_size}")
+        self.file = file
+        self.codec = codec
+        self.block_size = block_size
+        self.index = []
+        self.original_size = 0
+        self.compressed_size = 0
+        self._pending = bytearray()
+        self._start = file.tell() if file.seekable() else None
+        self._write_header(UNKNOWN_SIZE)
+
+    def _write_header(self, original_size):
+        name = self.codec.name.encode('utf-8')
+        params = json.dumps(self.codec.params(), sort_keys=True).encode('utf-8')
+        header = (MAGIC + bytes((VERSION, len(name))) + name + len(params).to_bytes(2, 'big') + params +
+                  _HEADER_END.pack(self.block_size, original_size))
+        self.file.write(header)
+        self._header_size = len(header)
+        self.compressed_size = len(header)
+
+    def _write_block(self, block):
+        self._write_frame(len(block), zlib.crc32(block), self.codec.compress(block))
+
+    def _write_frame(self, original_length, crc, payload):
+        self.index.append((self.compressed_size, self.original_size))
+        self.file.write(_FRAME.pack(original_length, len(payload), crc))
+        self.file.write(payload)
+        self.original_size += original_length
+        self.compressed_size += _FRAME.size + len(payload)
+
+    def _cut_blocks(self, buffer, filled, final):
+        """Split buffer[:filled] into block ranges; without final the tail shorter than a block is kept."""
+        blocks = []
+        start = 0
+        with buffer[:filled] as data:
+            while filled - start >= self.block_size:
+                end = self.codec.block_boundary(data, start + self.block_size)
+                if end <= start:
+                    end = start + self.block_size
+                blocks.append((start, end))
+                start = end
+        if final and start < filled:
+            blocks.append((start, filled))
+        return blocks
+
+    def write(self, data):
+        """Buffer data and compress every full block."""
+        pending = self._pending
+        pending += data
+        start = 0
+        while len(pending) - start >= self.block_size:
+            end = self.codec.block_boundary(pending, start + self.block_size)
+            if end <= start:
+                end = start + self.block_size
+            self._write_block(bytes(pending[start:end]))
+            start = end
+        del pending[:start]
+
+    def write_parallel(self, source, workers, progress=None, total=0):
+        """
+        Read a binary file object to the end and compress its blocks in worker
+        processes; the output is the same as from write().
+        Input reaches the workers through shared memory: every batch is read
+        straight into a SharedMemory segment and workers compress slices of it,
+        so only the compressed blocks are pickled back.
+        progress(done, total) is called after every block.
+        """
+        batch_size = self.block_size * workers * PARALLEL_BLOCKS_PER_WORKER
+        shm = shared_memory.SharedMemory(create=True, size=batch_size)
+        buffer = shm.buf
+        try:
+            filled = len(self._pending)
+            buffer[:filled] = self._pending
+            self._pending.clear()
+            done = 0
+            eof = False
+            # spawn, not fork: the caller may be a multithreaded process (e.g. the GUI),
+            # and forking it from a worker thread can deadlock the children. Spawned
+            # workers start with an empty dictionary registry, so preset dictionaries are passed on
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=register_dictionaries,
+                                     initargs=(registered_dictionaries(),)) as pool:
+                try:
+                    while not eof or filled:
+                        while not eof and filled < batch_size:
+                            with buffer[filled:] as free:
+                                count = source.readinto(free)
+                            if count:
+                                filled += count
+                            else:
+                                eof = True
+
+                        blocks = self._cut_blocks(buffer, filled, eof)
+                        futures = [pool.submit(_compress_shared_block, shm.name, start, end, self.codec)
+                                   for start, end in blocks]
+                        for (start, end), future in zip(blocks, futures):
+                            payload, crc = future.result()
+                            self._write_frame(end - start, crc, payload)
+                            if progress is not None:
+                                progress(done + end, total)
+
+                        # The unfinished tail moves to the front of the segment
+                        consumed = blocks[-1][1] if blocks else 0
+                        tail = bytes(buffer[consumed:filled])
+                        buffer[:len(tail)] = tail
+                        filled = len(tail)
+                        done += consumed
+                finally:
+                    pool.shutdown(cancel_futures=True)
+        finally:
+            del buffer
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        """Compress the last block and write the end marker, index and footer."""
+        if self.file is None:
+            return
+        if self._pending:
+            self._write_block(bytes(self._pending))
+            self._pending.clear()
+        file = self.file
+        file.write(_FRAME.pack(0, 0, 0))
+        index_offset = self.compressed_size + _FRAME.size
+        for entry in self.index:
+            file.write(_INDEX_ENTRY.pack(*entry))
+        file.write(_FOOTER.pack(index_offset, len(self.index), FOOTER_MAGIC))
+        self.compressed_size = index_offset + _INDEX_ENTRY.size * len(self.index) + _FOOTER.size
+
+        # The original size is only known now; patch it into the header when possible
+        if self._start is not None:
+            end = file.tell()
+            file.seek(self._start + self._header_size - 8)
+            file.write(self.original_size.to_bytes(8, 'big'))
+            file.seek(end)
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # After an error (or a cancel) the container is left without an index
+        if exc_type is None:
+            self.close()
+
+
+def _read_header(file):
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a container file")
+    version, name_length = _read_exact(file, 2)
+    if version != VERSION:
+        raise ValueError(f"Unsupported container version: {version}")
+    name = _read_exact(file, name_length).decode('utf-8')
+    params_length = int.from_bytes(_read_exact(file, 2), 'big')
+    params = json.loads(_read_exact(file, params_length))
+    block_size, original_size = _HEADER_END.unpack(_read_exact(file, _HEADER_END.size))
+    codec = get_codec(name, **params)
+    return codec, block_size, None if original_size == UNKNOWN_SIZE else original_size
+
+
+def _read_frame(file, codec):
+    """Read one block frame; returns the decompressed block or None at the end marker."""
+    original_length, compressed_length, crc = _FRAME.unpack(_read_exact(file, _FRAME.size))
+    if not original_length and not compressed_length:
+        return None
+    block = codec.decompress(_read_exact(file, compressed_length))
+    if len(block) != original_length or zlib.crc32(block) != crc:
+        raise ValueError("Container block is corrupted: checksum mismatch")
+    return block
+
+
+def iter_container(file):
+    """
+    Yield the decompressed blocks of a container from a binary file object.
+    Reads frames sequentially, so the file does not need to be seekable.
+    """
+    codec, _, _ = _read_header(file)
+    while True:
+        block = _read_frame(file, codec)
+        if block is None:
+            return
+        yield block
+
+
+class ContainerReader:
+    """
+    Random access to a container in a seekable binary file object:
+    the trailing index maps original offsets to blocks.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        file.seek(0)
+        self.codec, self.block_size, original_size = _read_header(file)
+
+        file.seek(-_FOOTER.size, os.SEEK_END)
+        index_offset, block_count, footer_magic = _FOOTER.unpack(_read_exact(file, _FOOTER.size))
+        if footer_magic != FOOTER_MAGIC:
+            raise ValueError("Container index is missing or corrupted")
+        file.seek(index_offset)
+        index = _read_exact(file, _INDEX_ENTRY.size * block_count)
+        self.frame_offsets = []
+        self.block_starts = []
+        for frame_offset, block_start in _INDEX_ENTRY.iter_unpack(index):
+            self.frame_offsets.append(frame_offset)
+            self.block_starts.append(block_start)
+
+        if original_size is None:
+            # The writer could not seek back: take the size from the last block frame
+            original_size = 0
+            if block_count:
+                file.seek(self.frame_offsets[-1])
+                last_length = _FRAME.unpack(_read_exact(file, _FRAME.size))[0]
+                original_size = self.block_starts[-1] + last_length
+        self.original_size = original_size
+
+    def __len__(self):
+        return len(self.frame_offsets)
+
+    def read_block(self, index):
+        """Decompress and verify block number index."""
+        self.file.seek(self.frame_offsets[index])
+        return _read_frame(self.file, self.codec)
+
+    def read(self, offset=0, size=None):
+        """Return size bytes of the original data starting at offset, decoding only the blocks involved."""
+        if offset < 0:
+            raise ValueError(f"Offset must not be negative, got {offset}")
+        if size is not None and size < 0:
+            raise ValueError(f"Size must not be negative, got {size}")
+        end = self.original_size if size is None else min(offset + size, self.original_size)
+        if offset >= end:
+            return b''
+        first = bisect.bisect_right(self.block_starts, offset) - 1
+        last = bisect.bisect_left(self.block_starts, end)
+        data = b''.join(self.read_block(index) for index in range(first, last))
+        start = offset - self.block_starts[first]
+        return data[start:start + end - offset]
+
+
+def pack_file(input_file, output_file, codec, block_size=DEFAULT_BLOCK_SIZE, chunk_size=DEFAULT_CHUNK_SIZE,
+              progress=None, workers=1):
+    """
+    Compress a file into a container with the given codec instance.
+    With workers > 1 blocks are compressed in that many processes (see ContainerWriter.write_parallel).
+    progress(done, total) is called with input bytes consumed (see codec.track_progress).
+    Returns a dictionary with compression statistics.
+    """
+    start_time = time.perf_counter()
+    total = os.path.getsize(input_file)
+    with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+        with ContainerWriter(target, codec, block_size) as writer:
+            if workers > 1:
+                writer.write_parallel(source, workers, progress, total)
+            else:
+                chunks = iter(lambda: source.read(chunk_size), b'')
+                for chunk in track_progress(chunks, total, progress):
+                    writer.write(chunk)
+    compression_time = (time.perf_counter() - start_time) * 1000
+    original_size = writer.original_size
+    compressed_size = writer.compressed_size
+    return {
+        'compression_time': compression_time,
+        'original_size': original_size,
+        'compressed_size': compressed_size,
+        'compression_ratio': (original_size - compressed_size) / original_size * 100 if original_size > 0 else 0
+    }
+
+
+def pack_bytes(data, codec, block_size=DEFAULT_BLOCK_SIZE, workers=1):
+    """
+    Build a container in memory from bytes-like data, using worker processes when workers > 1.
+    Returns a dictionary with the container bytes and compression statistics.
+    """
+    start_time = time.perf_counter()
+    target = io.BytesIO()
+    with ContainerWriter(target, codec, block_size) as writer:
+        if workers > 1:
+            writer.write_parallel(io.BytesIO(data), workers)
+        else:
+            writer.write(data)
+    compression_time = (time.perf_counter() - start_time) * 1000
+    original_size = writer.original_size
+    compressed_size = writer.compressed_size
+    return {
+        'compressed_bytes': target.getvalue(),
+        'compression_time': compression_time,
+        'original_size': original_size,
+        'compressed_size': compressed_size,
+        'compression_ratio': (original_size - compressed_size) / original_size * 100 if original_size > 0 else 0
+    }
+
+
+def unpack_file(input_file, output_file, progress=None):
+    """
+    Decompress a container file; the codec and its parameters come from the header.
+    progress(done, total) is called after every block with container bytes consumed.
+    Returns a dictionary with decompression statistics.
+    """
+    start_time = time.perf_counter()
+    decompressed_size = 0
+    total = os.path.getsize(input_file)
+    with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+        for block in iter_container(source):
+            decompressed_size += len(block)
+            target.write(block)
+            if progress is not None:
+                progress(source.tell(), total)
+    return {
+        'decompression_time': (time.perf_counter() - start_time) * 1000,
+        'compressed_size': os.path.getsize(input_file),
+        'decompressed_size': decompressed_size
+    }
+
+
+def read_range(path, offset, size):
+    """Read size bytes at offset of the original data stored in a container file."""
+    with open(path, 'rb') as f:
+        return ContainerReader(f).read(offset, size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-describing container of independently compressed blocks")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("-d", "--decompress", action="store_true",
+                        help="decompress; the codec and its parameters are read from the container")
+    parser.add_argument("--codec", choices=available_codecs(), default='deflate')
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="codec parameter, e.g. -p level=6")
+    parser.add_argument("--dictionary", help="preset dictionary file (see dictionaries.py); compressing "
+                                             "sets -p dictionary_id, decompressing makes it available")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="compress blocks in this many processes (0 = all cores)")
+    parser.add_argument("--range", nargs=2, type=int, metavar=("OFFSET", "SIZE"),
+                        help="with --decompress, extract only this byte range of the original")
+    args = parser.parse_args()
+    if not 0 < args.block_size <= MAX_BLOCK_SIZE:
+        parser.error(f"--block-size must be between 1 and {MAX_BLOCK_SIZE}")
+    params = parse_params(args.param)
+    if args.dictionary:
+        params.setdefault('dictionary_id', load_dictionary(args.dictionary))
+
+    if args.decompress and args.range:
+        data = read_range(args.input_file, *args.range)
+        with open(args.output_file, 'wb') as f:
+            f.write(data)
+        print(f"Extracted {len(data)} bytes at offset {args.range[0]}: {args.input_file} -> {args.output_file}")
+    elif args.decompress:
+        result = unpack_file(args.input_file, args.output_file)
+        print(f"Decompression successful: {args.input_file} -> {args.output_file}")
+        print(f"Compressed size: {result['compressed_size']} bytes")
+        print(f"Decompressed size: {result['decompressed_size']} bytes")
+    else:
+        try:
+            codec = get_codec(args.codec, **params)
+        except TypeError:
+            parser.error(f"unsupported parameters for {args.codec}: {', '.join(params)}")
+        workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+        result = pack_file(args.input_file, args.output_file, codec, args.block_size, workers=workers)
+        print(f"Compression successful: {args.input_file} -> {args.output_file}")
+        print(f"Original size: {result['original_size']} bytes")
+        print(f"Compressed size: {result['compressed_size']} bytes")
+        print(f"Compression ratio: {result['compression_ratio']:.2f}%")
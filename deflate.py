@@ -1,19 +1,126 @@
+import argparse
 import zlib
 import time
-import sys
+import os
+import itertools
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from chunk_io import DEFAULT_CHUNK_SIZE, read_chunks
+from dictionaries import get_dictionary, load_dictionary
 
+DEFAULT_PARALLEL_BLOCK_SIZE = 128 * 1024
+# DEFLATE can reference at most 32 KB back, so that much history primes each block
+DEFLATE_WINDOW_SIZE = 32 * 1024
+# Empty final block that terminates a raw DEFLATE stream
+DEFLATE_FINAL_BLOCK = b'\x03\x00'
 
-def deflate_compress(text):
+DEFAULT_LEVEL = 9
+DEFAULT_WBITS = zlib.MAX_WBITS
+# Let the decompressor detect zlib or gzip framing from the header
+AUTO_DETECT_WBITS = zlib.MAX_WBITS | 32
+STRATEGIES = {
+    'default': zlib.Z_DEFAULT_STRATEGY,
+    'filtered': zlib.Z_FILTERED,
+    'huffman_only': zlib.Z_HUFFMAN_ONLY,
+    'rle': zlib.Z_RLE,
+    'fixed': zlib.Z_FIXED,
+}
+FRAMINGS = ('zlib', 'gzip', 'raw')
+
+
+def framing_wbits(framing, window_bits=zlib.MAX_WBITS):
     """
-    Compress a string using DEFLATE algorithm (zlib).
+    Translate a framing name ('zlib', 'gzip' or 'raw') and a window size
+    in bits (9..15) into the wbits value zlib expects.
+    """
+    if not 9 <= window_bits <= 15:
+        raise ValueError(f"Window bits must be between 9 and 15, got {window_bits}")
+    if framing == 'zlib':
+        return window_bits
+    if framing == 'gzip':
+        return window_bits + 16
+    if framing == 'raw':
+        return -window_bits
+    raise ValueError(f"Unknown framing: {framing}")
+
+
+def _split_wbits(wbits):
+    """Inverse of framing_wbits: return (framing, window_bits)."""
+    if 9 <= wbits <= 15:
+        return 'zlib', wbits
+    if 25 <= wbits <= 31:
+        return 'gzip', wbits - 16
+    if -15 <= wbits <= -9:
+        return 'raw', -wbits
+    raise ValueError(f"Invalid wbits value: {wbits}")
+
+
+def _check_dictionary_framing(wbits, dictionary_id):
+    """The gzip header has no DICTID field, so preset dictionaries only work with zlib or raw framing."""
+    if dictionary_id is not None and 25 <= wbits <= 31:
+        raise ValueError("Preset dictionaries cannot be used with gzip framing; use zlib or raw")
+
+
+def _compressobj(level, wbits, mem_level, strategy, zdict=None):
+    if zdict:
+        return zlib.compressobj(level, zlib.DEFLATED, wbits, mem_level, strategy, zdict)
+    return zlib.compressobj(level, zlib.DEFLATED, wbits, mem_level, strategy)
+
+
+@lru_cache(maxsize=32)
+def _primed_compressobj(level, wbits, mem_level, strategy, dictionary_id):
+    return _compressobj(level, wbits, mem_level, strategy, get_dictionary(dictionary_id))
+
+
+def _new_compressor(level, wbits, mem_level, strategy, dictionary_id=None):
+    """
+    Create a compressobj. Priming with a preset dictionary costs more than
+    compressing a small record, so primed compressors are copied from a cached one.
+    """
+    if dictionary_id is None:
+        return _compressobj(level, wbits, mem_level, strategy)
+    return _primed_compressobj(level, wbits, mem_level, strategy, dictionary_id).copy()
+
+
+def _header_dictionary_id(data, wbits):
+    """Return the DICTID from a zlib header that requests a preset dictionary, else None."""
+    if wbits < 0 or 25 <= wbits <= 31 or len(data) < 6:
+        return None
+    cmf, flg = data[0], data[1]
+    if cmf & 0x0F != zlib.DEFLATED or (cmf * 256 + flg) % 31 or not flg & 0x20:
+        return None
+    return int.from_bytes(data[2:6], 'big')
+
+
+def _decompressobj(wbits, dictionary_id=None):
+    if dictionary_id is None:
+        return zlib.decompressobj(wbits)
+    return zlib.decompressobj(wbits, zdict=get_dictionary(dictionary_id))
+
+
+def deflate_compress_bytes(data, level=DEFAULT_LEVEL, wbits=DEFAULT_WBITS, mem_level=zlib.DEF_MEM_LEVEL,
+                           strategy=zlib.Z_DEFAULT_STRATEGY, workers=1, dictionary_id=None):
+    """
+    Compress bytes-like data (bytes, bytearray, memoryview) using DEFLATE (zlib).
+    level, wbits (framing and window size, see framing_wbits), mem_level and
+    strategy are passed to zlib.compressobj. dictionary_id selects a registered
+    preset dictionary (see dictionaries.py), which pays off on small records.
+    With workers > 1 blocks are compressed in parallel (see deflate_compress_parallel_stream).
     Returns a dictionary with compressed bytes and statistics.
+    Raises ValueError if dictionary_id is combined with gzip framing.
     """
+    _check_dictionary_framing(wbits, dictionary_id)
     try:
-        data = text.encode('utf-8')
-        original_size = len(data)
+        original_size = memoryview(data).nbytes
 
         start_time = time.time()
-        compressed_data = zlib.compress(data, level=9)
+        if workers > 1:
+            compressed_data = b''.join(deflate_compress_parallel_stream(
+                [data], level, wbits, mem_level, strategy, workers=workers, dictionary_id=dictionary_id))
+        else:
+            compressor = _new_compressor(level, wbits, mem_level, strategy, dictionary_id)
+            compressed_data = compressor.compress(data) + compressor.flush()
         compression_time = (time.time() - start_time) * 1000
 
         compressed_size = len(compressed_data)
@@ -31,18 +138,262 @@ def deflate_compress(text):
         raise Exception(f"Error during compression: {str(e)}")
 
 
-def deflate_decompress(compressed_bytes):
+def deflate_compress(text, level=DEFAULT_LEVEL, wbits=DEFAULT_WBITS, mem_level=zlib.DEF_MEM_LEVEL,
+                     strategy=zlib.Z_DEFAULT_STRATEGY, workers=1, dictionary_id=None):
+    """
+    Compress a string using DEFLATE algorithm (zlib): UTF-8 encode and call deflate_compress_bytes.
+    Returns a dictionary with compressed bytes and statistics.
+    """
+    return deflate_compress_bytes(text.encode('utf-8'), level, wbits, mem_level, strategy, workers, dictionary_id)
+
+
+def deflate_decompress_bytes(compressed_bytes, wbits=AUTO_DETECT_WBITS, dictionary_id=None):
+    """
+    Decompress DEFLATE data given as bytes-like. The default wbits accepts zlib
+    and gzip framing; raw streams need the negative wbits they were written with.
+    zlib streams name their preset dictionary in the header; raw streams need dictionary_id.
+    Returns a dictionary with the decompressed bytes and statistics.
+    """
     try:
         start_time = time.time()
-        decompressed_data = zlib.decompress(compressed_bytes)
+        if dictionary_id is None:
+            dictionary_id = _header_dictionary_id(compressed_bytes, wbits)
+        if dictionary_id is None:
+            decompressed_data = zlib.decompress(compressed_bytes, wbits)
+        else:
+            decompressor = _decompressobj(wbits, dictionary_id)
+            decompressed_data = decompressor.decompress(compressed_bytes) + decompressor.flush()
+            if not decompressor.eof:
+                raise zlib.error("Compressed stream is truncated")
         decompression_time = (time.time() - start_time) * 1000
 
-        decompressed_text = decompressed_data.decode('utf-8')
-        compressed_size = len(compressed_bytes)
-        decompressed_size = len(decompressed_data)
+        return {
+            'decompressed_bytes': decompressed_data,
+            'decompression_time': decompression_time,
+            'compressed_size': memoryview(compressed_bytes).nbytes,
+            'decompressed_size': len(decompressed_data)
+        }
+
+    except zlib.error:
+        raise Exception("Invalid compressed data or not a DEFLATE-compressed file")
+    except Exception as e:
+        raise Exception(f"Error during decompression: {str(e)}")
+
+
+def deflate_decompress(compressed_bytes, wbits=AUTO_DETECT_WBITS, dictionary_id=None):
+    """
+    Decompress DEFLATE data holding UTF-8 text (see deflate_decompress_bytes).
+    Returns a dictionary with the decompressed text and statistics.
+    """
+    result = deflate_decompress_bytes(compressed_bytes, wbits, dictionary_id)
+    try:
+        result['decompressed_text'] = result.pop('decompressed_bytes').decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise Exception(f"Error during decompression: {str(e)}")
+    return result
+
+
+def deflate_compress_stream(chunks, level=DEFAULT_LEVEL, wbits=DEFAULT_WBITS, mem_level=zlib.DEF_MEM_LEVEL,
+                            strategy=zlib.Z_DEFAULT_STRATEGY, dictionary_id=None):
+    """
+    Compress an iterable of byte chunks using DEFLATE (zlib).
+    Yields compressed chunks; only one chunk is held in memory at a time.
+    """
+    _check_dictionary_framing(wbits, dictionary_id)
+    compressor = _new_compressor(level, wbits, mem_level, strategy, dictionary_id)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _zlib_header(level, window_bits, dictionary_id=None):
+    """Build the zlib header for the given level, window size and optional preset dictionary."""
+    cmf = ((window_bits - 8) << 4) | zlib.DEFLATED
+    if level == zlib.Z_DEFAULT_COMPRESSION or level == 6:
+        flevel = 2
+    elif level < 2:
+        flevel = 0
+    elif level < 6:
+        flevel = 1
+    else:
+        flevel = 3
+    flg = flevel << 6
+    if dictionary_id is not None:
+        flg |= 0x20
+    flg += 31 - (cmf * 256 + flg) % 31
+    if dictionary_id is not None:
+        return bytes((cmf, flg)) + dictionary_id.to_bytes(4, 'big')
+    return bytes((cmf, flg))
+
+
+def _gzip_header(level):
+    """Build a minimal gzip member header (no name, no mtime)."""
+    extra_flags = 2 if level == 9 else 4 if level == 1 else 0
+    return b'\x1f\x8b\x08\x00\x00\x00\x00\x00' + bytes((extra_flags, 255))
+
+
+def _iter_blocks(chunks, block_size):
+    """Regroup an iterable of byte chunks into blocks of block_size bytes."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= block_size:
+            yield bytes(buffer[:block_size])
+            del buffer[:block_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _compress_block(block, dictionary, level, window_bits, mem_level, strategy):
+    """Compress one block as raw DEFLATE primed with dictionary, ending on a byte boundary."""
+    compressor = _compressobj(level, -window_bits, mem_level, strategy, dictionary)
+    return compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def deflate_compress_parallel_stream(chunks, level=DEFAULT_LEVEL, wbits=DEFAULT_WBITS, mem_level=zlib.DEF_MEM_LEVEL,
+                                     strategy=zlib.Z_DEFAULT_STRATEGY, block_size=DEFAULT_PARALLEL_BLOCK_SIZE,
+                                     workers=None, dictionary_id=None):
+    """
+    Compress an iterable of byte chunks with independent DEFLATE blocks on a thread pool.
+    zlib releases the GIL, so blocks compress concurrently. Each block is primed
+    with the previous 32 KB of input as a preset dictionary and sync-flushed, so
+    the concatenated blocks form one ordinary zlib, gzip or raw stream (chosen by
+    wbits) readable by any inflater. A preset dictionary primes the first block.
+    Yields compressed chunks in order; at most 2 * workers blocks are in flight.
+    """
+    _check_dictionary_framing(wbits, dictionary_id)
+    framing, window_bits = _split_wbits(wbits)
+    history_size = min(1 << window_bits, DEFLATE_WINDOW_SIZE)
+    workers = workers or os.cpu_count() or 1
+    adler = zlib.adler32(b'')
+    crc = zlib.crc32(b'')
+    total_size = 0
+    history = get_dictionary(dictionary_id)[-history_size:] if dictionary_id is not None else b''
+    pending = deque()
+
+    if framing == 'zlib':
+        yield _zlib_header(level, window_bits, dictionary_id)
+    elif framing == 'gzip':
+        yield _gzip_header(level)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for block in _iter_blocks(chunks, block_size):
+            pending.append(pool.submit(_compress_block, block, history, level, window_bits, mem_level, strategy))
+            if framing == 'zlib':
+                adler = zlib.adler32(block, adler)
+            elif framing == 'gzip':
+                crc = zlib.crc32(block, crc)
+            total_size += len(block)
+            history = (history + block)[-history_size:]
+            while len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    if framing == 'zlib':
+        yield DEFLATE_FINAL_BLOCK + adler.to_bytes(4, 'big')
+    elif framing == 'gzip':
+        yield DEFLATE_FINAL_BLOCK + crc.to_bytes(4, 'little') + (total_size & 0xFFFFFFFF).to_bytes(4, 'little')
+    else:
+        yield DEFLATE_FINAL_BLOCK
+
+
+def deflate_decompress_stream(chunks, chunk_size=DEFAULT_CHUNK_SIZE, wbits=AUTO_DETECT_WBITS, dictionary_id=None):
+    """
+    Decompress an iterable of DEFLATE (zlib) chunks.
+    Yields decompressed chunks of at most chunk_size bytes.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b'')
+    if dictionary_id is None:
+        dictionary_id = _header_dictionary_id(first, wbits)
+    decompressor = _decompressobj(wbits, dictionary_id)
+    for chunk in itertools.chain([first], chunks):
+        data = decompressor.decompress(chunk, chunk_size)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+        if decompressor.eof:
+            break
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+    if not decompressor.eof:
+        raise zlib.error("Compressed stream is truncated")
+
+
+def deflate_compress_file(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE, level=DEFAULT_LEVEL,
+                          wbits=DEFAULT_WBITS, mem_level=zlib.DEF_MEM_LEVEL, strategy=zlib.Z_DEFAULT_STRATEGY,
+                          workers=1, dictionary_id=None):
+    """
+    Compress a file into another file chunk by chunk in constant memory.
+    With workers > 1 blocks are compressed in parallel (see deflate_compress_parallel_stream).
+    Returns a dictionary with compression statistics.
+    Raises ValueError if dictionary_id is combined with gzip framing.
+    """
+    _check_dictionary_framing(wbits, dictionary_id)
+    try:
+        original_size = 0
+        compressed_size = 0
+
+        start_time = time.time()
+        with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+            def counted(chunks):
+                nonlocal original_size
+                for chunk in chunks:
+                    original_size += len(chunk)
+                    yield chunk
+
+            chunks = counted(read_chunks(source, chunk_size))
+            if workers > 1:
+                compressed_chunks = deflate_compress_parallel_stream(
+                    chunks, level, wbits, mem_level, strategy, workers=workers, dictionary_id=dictionary_id)
+            else:
+                compressed_chunks = deflate_compress_stream(chunks, level, wbits, mem_level, strategy, dictionary_id)
+            for compressed in compressed_chunks:
+                compressed_size += len(compressed)
+                target.write(compressed)
+        compression_time = (time.time() - start_time) * 1000
+
+        compression_ratio = ((original_size - compressed_size) / original_size * 100) if original_size > 0 else 0
+
+        return {
+            'compression_time': compression_time,
+            'original_size': original_size,
+            'compressed_size': compressed_size,
+            'compression_ratio': compression_ratio
+        }
+
+    except Exception as e:
+        raise Exception(f"Error during compression: {str(e)}")
+
+
+def deflate_decompress_file(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE, wbits=AUTO_DETECT_WBITS,
+                            dictionary_id=None):
+    """
+    Decompress a DEFLATE-compressed file into another file chunk by chunk.
+    Returns a dictionary with decompression statistics.
+    """
+    try:
+        compressed_size = 0
+        decompressed_size = 0
+
+        start_time = time.time()
+        with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+            def counted(chunks):
+                nonlocal compressed_size
+                for chunk in chunks:
+                    compressed_size += len(chunk)
+                    yield chunk
+
+            chunks = counted(read_chunks(source, chunk_size))
+            for data in deflate_decompress_stream(chunks, chunk_size, wbits, dictionary_id):
+                decompressed_size += len(data)
+                target.write(data)
+        decompression_time = (time.time() - start_time) * 1000
 
         return {
-            'decompressed_text': decompressed_text,
             'decompression_time': decompression_time,
             'compressed_size': compressed_size,
             'decompressed_size': decompressed_size
@@ -55,29 +406,44 @@ def deflate_decompress(compressed_bytes):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python deflate.py <input_file> <output_file> [--decompress]")
-        sys.exit(1)
-
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    decompress = len(sys.argv) > 3 and sys.argv[3] == "--decompress"
-
-    if decompress:
-        with open(input_file, 'rb') as f:
-            compressed_bytes = f.read()
-        result = deflate_decompress(compressed_bytes)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(result['decompressed_text'])
+    parser = argparse.ArgumentParser(description="DEFLATE (zlib) file compression")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--decompress", action="store_true", help="decompress instead of compress")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="compress blocks on this many threads (0 = all cores)")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL, choices=range(0, 10),
+                        help="compression level, 0 (none) to 9 (best)")
+    parser.add_argument("--framing", choices=FRAMINGS, default='zlib',
+                        help="stream framing; on decompression zlib and gzip are detected automatically")
+    parser.add_argument("--window-bits", type=int, default=zlib.MAX_WBITS, choices=range(9, 16),
+                        help="log2 of the window size")
+    parser.add_argument("--mem-level", type=int, default=zlib.DEF_MEM_LEVEL, choices=range(1, 10),
+                        help="memory used for the internal compression state, 1 to 9")
+    parser.add_argument("--strategy", choices=STRATEGIES, default='default',
+                        help="zlib compression strategy")
+    parser.add_argument("--dictionary", help="preset dictionary file (see dictionaries.py)")
+    args = parser.parse_args()
+    if args.dictionary and args.framing == 'gzip':
+        parser.error("--dictionary cannot be combined with --framing gzip (gzip has no dictionary ID field)")
+
+    input_file = args.input_file
+    output_file = args.output_file
+    wbits = framing_wbits(args.framing, args.window_bits)
+    dictionary_id = load_dictionary(args.dictionary) if args.dictionary else None
+
+    if args.decompress:
+        result = deflate_decompress_file(input_file, output_file,
+                                         wbits=wbits if args.framing == 'raw' else AUTO_DETECT_WBITS,
+                                         dictionary_id=dictionary_id)
         print(f"Decompression successful: {input_file} -> {output_file}")
         print(f"Compressed size: {result['compressed_size']} bytes")
         print(f"Decompressed size: {result['decompressed_size']} bytes")
     else:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            text = f.read()
-        result = deflate_compress(text)
-        with open(output_file, 'wb') as f:
-            f.write(result['compressed_bytes'])
+        workers = args.threads if args.threads > 0 else (os.cpu_count() or 1)
+        result = deflate_compress_file(input_file, output_file, level=args.level, wbits=wbits,
+                                       mem_level=args.mem_level, strategy=STRATEGIES[args.strategy],
+                                       workers=workers, dictionary_id=dictionary_id)
         print(f"Compression successful: {input_file} -> {output_file}")
         print(f"Original size: {result['original_size']} bytes")
         print(f"Compressed size: {result['compressed_size']} bytes")
@@ -0,0 +1,142 @@
+import argparse
+import heapq
+import random
+import zlib
+from collections import Counter
+
+# DEFLATE can only reference the last 32 KB, so a larger dictionary is wasted
+DEFAULT_DICTIONARY_SIZE = 32 * 1024
+DEFAULT_SEGMENT_SIZE = 64
+DEFAULT_DMER_SIZE = 8
+DEFAULT_MAX_SAMPLES = 10000
+
+_registry = {}
+
+
+def dictionary_id(dictionary):
+    """
+    ID of a preset dictionary: its Adler-32, the same value zlib stores in the
+    DICTID field of a stream header, so zlib streams name their dictionary.
+    """
+    return zlib.adler32(dictionary)
+
+
+def register_dictionary(dictionary):
+    """Make a dictionary available to the codecs and return its ID."""
+    dictionary = bytes(dictionary)
+    dict_id = dictionary_id(dictionary)
+    _registry[dict_id] = dictionary
+    return dict_id
+
+
+def registered_dictionaries():
+    """All registered dictionaries, e.g. to register them again in a worker process."""
+    return list(_registry.values())
+
+
+def register_dictionaries(dictionaries):
+    """Register every dictionary in an iterable; usable as a process pool initializer."""
+    for dictionary in dictionaries:
+        register_dictionary(dictionary)
+
+
+def load_dictionary(path):
+    """Read a dictionary file, register it and return its ID."""
+    with open(path, 'rb') as f:
+        return register_dictionary(f.read())
+
+
+def get_dictionary(dict_id):
+    """Return the registered dictionary with the given ID."""
+    try:
+        return _registry[dict_id]
+    except KeyError:
+        raise ValueError(f"Unknown dictionary id: {dict_id:#010x}")
+
+
+def train_dictionary(samples, size=DEFAULT_DICTIONARY_SIZE, segment_size=DEFAULT_SEGMENT_SIZE,
+                     dmer_size=DEFAULT_DMER_SIZE):
+    """
+    Build a preset dictionary from sample records (a simplified COVER algorithm).
+    Every dmer_size-byte substring is scored by the number of samples it occurs
+    in. Candidate segments of segment_size bytes are picked greedily by the
+    total score of the substrings they cover that no earlier segment covered.
+    The best segments go last, nearest to the data they will prime.
+    """
+    samples = [bytes(sample) for sample in samples if sample]
+
+    frequencies = Counter()
+    for sample in samples:
+        frequencies.update({sample[i:i + dmer_size] for i in range(len(sample) - dmer_size + 1)})
+
+    candidates = set()
+    step = max(segment_size // 2, 1)
+    for sample in samples:
+        for start in range(0, max(len(sample) - dmer_size + 1, 1), step):
+            candidates.add(sample[start:start + segment_size])
+
+    def dmers(segment):
+        return {segment[i:i + dmer_size] for i in range(len(segment) - dmer_size + 1)}
+
+    def score(segment, covered):
+        # Substrings seen in a single sample do not help other records
+        return sum(frequencies[d] for d in dmers(segment) - covered if frequencies[d] > 1)
+
+    covered = set()
+    heap = [(-score(segment, covered), segment) for segment in candidates]
+    heapq.heapify(heap)
+
+    selected = []
+    total = 0
+    # Lazy greedy: scores only drop as coverage grows, so a popped segment whose
+    # refreshed score still beats the next best can be taken without a full rescan
+    while heap and total < size:
+        _, segment = heapq.heappop(heap)
+        current = score(segment, covered)
+        if current <= 0:
+            continue
+        if heap and current < -heap[0][0]:
+            heapq.heappush(heap, (-current, segment))
+            continue
+        selected.append(segment)
+        covered |= dmers(segment)
+        total += len(segment)
+
+    return b''.join(reversed(selected))[-size:]
+
+
+def read_samples(paths, lines=False, max_samples=DEFAULT_MAX_SAMPLES, seed=0):
+    """
+    Read training samples: each file is one sample, or with lines=True each
+    non-empty line is one record. At most max_samples are drawn at random.
+    """
+    samples = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            if lines:
+                samples.extend(line for line in f if line.strip())
+            else:
+                samples.append(f.read())
+    if len(samples) > max_samples:
+        samples = random.Random(seed).sample(samples, max_samples)
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a preset dictionary for DEFLATE/Brotli on small records")
+    parser.add_argument("output_file")
+    parser.add_argument("sample_files", nargs="+")
+    parser.add_argument("--size", type=int, default=DEFAULT_DICTIONARY_SIZE, help="dictionary size in bytes")
+    parser.add_argument("--lines", action="store_true", help="treat every line of the inputs as a separate record")
+    parser.add_argument("--max-samples", type=int, default=DEFAULT_MAX_SAMPLES)
+    args = parser.parse_args()
+
+    samples = read_samples(args.sample_files, args.lines, args.max_samples)
+    dictionary = train_dictionary(samples, args.size)
+    with open(args.output_file, 'wb') as f:
+        f.write(dictionary)
+
+    print(f"Dictionary written: {args.output_file}")
+    print(f"Samples: {len(samples)}")
+    print(f"Size: {len(dictionary)} bytes")
+    print(f"Dictionary id: {dictionary_id(dictionary):#010x}")
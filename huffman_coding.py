@@ -1,131 +1,471 @@
+import codecs
 import heapq
 from collections import Counter
-from bitstring import BitArray
-from huffman_node import HuffmanNode
+from bit_io import BitReader, BitWriter
+from chunk_io import DEFAULT_CHUNK_SIZE, read_chunks
+from huffman_node import HuffmanTree
+
+# Сколько бит декодер таблицей разбирает за один просмотр
+DECODE_TABLE_BITS = 10
+# Сколько символов кодируется за одну упаковку в целое число
+ENCODE_CHUNK_SIZE = 1 << 16
+# Размер блока потокового сжатия (в символах) и размер поля длины блока
+DEFAULT_BLOCK_SIZE = 1 << 20
+BLOCK_LENGTH_BYTES = 4
+# Заголовок потока блоков: сигнатура и режим; по нему поток отличается от
+# одиночного блока старых .huff
+BLOCK_STREAM_MAGIC = b'HUFB'
+BLOCK_STREAM_MODES = {'text': b'T', 'bytes': b'B'}
+# Ограничение длины кода по умолчанию; в заголовке под длину отведено 5 бит
+DEFAULT_MAX_CODE_LENGTH = 15
+MAX_HEADER_CODE_LENGTH = 31
+# Байтовый режим: фиксированный алфавит из 256 символов, длина кода — 4 бита
+BYTE_ALPHABET_SIZE = 256
+MAX_BYTE_CODE_LENGTH = 15
 
 
 def build_huffman_tree(freq_map):
-    heap = [HuffmanNode(char, freq) for char, freq in freq_map.items()]
-    heapq.heapify(heap)
-    while len(heap) > 1:
-        left = heapq.heappop(heap)
-        right = heapq.heappop(heap)
-        merged = HuffmanNode(None, left.freq + right.freq)
-        merged.left = left
-        merged.right = right
-        heapq.heappush(heap, merged)
-    return heap[0]
-
-
-def build_codes(node, prefix="", codebook=None):
-    if codebook is None:
-        codebook = {}
-    if node is not None:
-        if node.char is not None:
-            codebook[node.char] = prefix
-        build_codes(node.left, prefix + "0", codebook)
-        build_codes(node.right, prefix + "1", codebook)
-    return codebook
-
-
-def compress(input_file, output_file):
-    # Чтение входного текста
-    with open(input_file, 'r', encoding='utf-8') as file:
-        text = file.read()
+    return HuffmanTree(freq_map)
 
-    if not text:
-        with open(output_file, 'wb') as file:
-            file.write(b'')
-        return
 
-    # Построение частот и дерева Хаффмана
-    freq_map = Counter(text)
+def limited_code_lengths(freq_map, max_length):
+    # Package-merge: оптимальные длины кодов при ограничении max_length.
+    # Если символов больше, чем помещается в max_length бит, предел поднимается
+    symbols = sorted(freq_map, key=lambda char: (freq_map[char], char))
+    if len(symbols) == 1:
+        return {symbols[0]: 1}
+    max_length = max(max_length, (len(symbols) - 1).bit_length())
+
+    # Уровни от самого глубокого (только листья) к верхнему; элемент — (вес, 0 для листа / 1 для пакета)
+    leaves = [(freq_map[char], 0) for char in symbols]
+    levels = [leaves]
+    current = leaves
+    for _ in range(max_length - 1):
+        packages = [(current[k][0] + current[k + 1][0], 1) for k in range(0, len(current) - 1, 2)]
+        current = list(heapq.merge(leaves, packages))
+        levels.append(current)
+
+    # Выбираем 2n-2 самых лёгких элементов верхнего уровня и спускаемся вниз:
+    # каждый выбранный лист удлиняет код символа на 1, пакеты раскрываются в пары
+    lengths = [0] * len(symbols)
+    count = 2 * len(symbols) - 2
+    for level in reversed(levels):
+        leaf_count = sum(1 for _, is_package in level[:count] if not is_package)
+        for k in range(leaf_count):
+            lengths[k] += 1
+        count = 2 * (count - leaf_count)
+
+    return dict(zip(symbols, lengths))
+
+
+def canonical_codes(code_lengths):
+    # Канонические коды: символы упорядочены по (длина, символ), код следующего
+    # символа — предыдущий код плюс один, сдвинутый на прирост длины
+    codes = {}
+    code = 0
+    prev_length = 0
+    for char in sorted(code_lengths, key=lambda c: (code_lengths[c], c)):
+        length = code_lengths[char]
+        code <<= length - prev_length
+        codes[char] = code
+        code += 1
+        prev_length = length
+    return codes
+
+
+def encode_text(text, codebook, writer):
+    # codebook: символ -> код строкой из '0'/'1' (словарь или список по значению
+    # байта). Коды блока символов склеиваются одним str.join и упаковываются в
+    # целое число одним int(bits, 2): это в разы быстрее сдвига аккумулятора на
+    # каждый символ в цикле интерпретатора, а промежуточная строка ограничена
+    # блоком, а не всем текстом
+    for start in range(0, len(text), ENCODE_CHUNK_SIZE):
+        bits = ''.join(map(codebook.__getitem__, text[start:start + ENCODE_CHUNK_SIZE]))
+        writer.write(int(bits, 2), len(bits))
+
+
+def _bit_codebook(codes, code_lengths):
+    # Коды строками фиксированной длины для encode_text
+    return {char: format(code, f'0{code_lengths[char]}b') for char, code in codes.items()}
+
+
+def build_decode_table(codes, code_lengths, empty=''):
+    # Символы — строки из одного символа (текстовый режим) или из одного байта
+    # (байтовый режим); empty — пустое значение того же типа для склейки
+    max_length = max(code_lengths.values())
+    table_bits = min(DECODE_TABLE_BITS, max_length)
+    size = 1 << table_bits
+    mask = size - 1
+
+    # Одиночные символы с кодами не длиннее table_bits
+    single = [None] * size
+    long_codes = {}
+    for char, code in codes.items():
+        length = code_lengths[char]
+        if length <= table_bits:
+            shift = table_bits - length
+            start = code << shift
+            for index in range(start, start + (1 << shift)):
+                single[index] = (char, length)
+        else:
+            prefix = code >> (length - table_bits)
+            long_codes.setdefault(prefix, []).append((char, code, length))
+
+    # Вторичные таблицы для длинных кодов: индекс — биты после префикса
+    subtables = {}
+    for prefix, entries in long_codes.items():
+        sub_bits = max(length for _, _, length in entries) - table_bits
+        subtable = [None] * (1 << sub_bits)
+        for char, code, length in entries:
+            rest_length = length - table_bits
+            rest = code & ((1 << rest_length) - 1)
+            shift = sub_bits - rest_length
+            start = rest << shift
+            for index in range(start, start + (1 << shift)):
+                subtable[index] = (char, length)
+        subtables[prefix] = (sub_bits, subtable)
+
+    # Основная таблица: сколько целых символов помещается в table_bits бит.
+    # Запись — (символы, всего бит, бит на первый символ)
+    table = [None] * size
+    for index in range(size):
+        entry = single[index]
+        if entry is None:
+            if index in subtables:
+                table[index] = ('', 0, 0)
+            continue
+        char, first_length = entry
+        chars = [char]
+        used = first_length
+        while used < table_bits:
+            following = single[(index << used) & mask]
+            if following is None or following[1] > table_bits - used:
+                break
+            chars.append(following[0])
+            used += following[1]
+        table[index] = (empty.join(chars), used, first_length)
+
+    return table_bits, table, subtables
+
+
+def decode_with_table(data, start_bit, bit_count, table_bits, table, subtables, empty=''):
+    decoded = []
+    mask = (1 << table_bits) - 1
+    pos = start_bit >> 3
+    skip = start_bit & 7
+    # Битовый буфер: acc_bits младших бит acc ещё не разобраны
+    acc = 0
+    acc_bits = 0
+    if skip:
+        acc = data[pos] & (0xFF >> skip)
+        acc_bits = 8 - skip
+        pos += 1
+    remaining = bit_count
+
+    while remaining > 0:
+        if acc_bits < 32:
+            # За концом данных подставляются нули: они не будут израсходованы,
+            # потому что remaining ограничивает разбор. Сдвиг вместо ljust —
+            # чтобы data мог быть и memoryview
+            chunk = data[pos:pos + 8]
+            acc = ((acc & ((1 << acc_bits) - 1)) << 64) | (int.from_bytes(chunk, 'big') << (64 - 8 * len(chunk)))
+            acc_bits += 64
+            pos += 8
+
+        index = (acc >> (acc_bits - table_bits)) & mask
+        entry = table[index]
+        if entry is None:
+            raise ValueError("Некорректный код Хаффмана в сжатых данных")
+        chars, used, first_length = entry
+        if used == 0:
+            sub_bits, subtable = subtables[index]
+            sub_entry = subtable[(acc >> (acc_bits - table_bits - sub_bits)) & ((1 << sub_bits) - 1)]
+            if sub_entry is None:
+                raise ValueError("Некорректный код Хаффмана в сжатых данных")
+            chars, used = sub_entry
+        elif used > remaining:
+            # Последние символы: не разбираем нули выравнивания как коды
+            chars = chars[:1]
+            used = first_length
+        if used > remaining:
+            raise ValueError("Сжатые данные обрываются посреди кода Хаффмана")
+        decoded.append(chars)
+        acc_bits -= used
+        remaining -= used
+
+    return empty.join(decoded)
+
+
+def build_code_lengths(freq_map, max_code_length):
     huffman_tree = build_huffman_tree(freq_map)
-    codebook = build_codes(huffman_tree)
 
-    # Канонические коды: сортируем по длине кода и символу
-    sorted_chars = sorted(codebook.keys(), key=lambda char: (len(codebook[char]), char))
-    code_lengths = {char: len(codebook[char]) for char in sorted_chars}
+    # Из дерева берутся только длины кодов; единственный символ получает код длины 1
+    code_lengths = {char: max(length, 1) for char, length in huffman_tree.code_lengths().items()}
 
-    # Проверка максимальной длины кода
-    max_code_length = max(code_lengths.values()) if code_lengths else 0
-    if max_code_length > 31:
-        raise ValueError(f"Длина кода Хаффмана ({max_code_length}) превышает максимум 31 бит.")
+    # Слишком длинные коды пересчитываются с ограничением длины
+    if max(code_lengths.values()) > max_code_length:
+        code_lengths = limited_code_lengths(freq_map, max_code_length)
+    return code_lengths
+
+
+def encode_block(text, max_code_length=DEFAULT_MAX_CODE_LENGTH):
+    if not 1 <= max_code_length <= MAX_HEADER_CODE_LENGTH:
+        raise ValueError(f"Максимальная длина кода должна быть от 1 до {MAX_HEADER_CODE_LENGTH} бит.")
+    if not text:
+        return bytearray()
+
+    # Построение частот и длин кодов
+    freq_map = Counter(text)
+    if max(map(ord, freq_map)) > 0xFFFF:
+        raise ValueError("Символы вне BMP не помещаются в 16-битный заголовок, используйте mode='bytes'.")
+    code_lengths = build_code_lengths(freq_map, max_code_length)
+    sorted_chars = sorted(code_lengths, key=lambda char: (code_lengths[char], char))
 
-    # Закодированный текст
-    encoded_text = ''.join(codebook[char] for char in text)
+    # Канонические коды в виде строк для упаковки блоками
+    codebook = _bit_codebook(canonical_codes(code_lengths), code_lengths)
+    encoded_length = sum(freq_map[char] * code_lengths[char] for char in sorted_chars)
 
     # Формируем битовый поток
-    output = BitArray()
+    output = BitWriter()
     # Количество символов (16 бит)
-    output.append(f'uint:16={len(codebook)}')
+    output.write(len(codebook), 16)
     # Символы и длины кодов
     for char in sorted_chars:
-        output.append(f'uint:16={ord(char)}')  # Символ (Unicode, 16 бит)
-        output.append(f'uint:5={code_lengths[char]}')  # Длина кода (5 бит, до 31 бит)
+        output.write(ord(char), 16)  # Символ (Unicode, 16 бит)
+        output.write(code_lengths[char], 5)  # Длина кода (5 бит, до 31 бит)
     # Длина закодированного текста (32 бита)
-    output.append(f'uint:32={len(encoded_text)}')
+    output.write(encoded_length, 32)
     # Сам закодированный текст
-    output.append(f'bin={encoded_text}')
-
-    # Запись в файл
-    with open(output_file, 'wb') as file:
-        output.tofile(file)
+    encode_text(text, codebook, output)
+    return output.getvalue()
 
 
-def decompress(input_file, output_file):
-    # Чтение битового потока
-    with open(input_file, 'rb') as file:
-        bits = BitArray(file.read())
-
-    if not bits:
-        with open(output_file, 'w', encoding='utf-8') as file:
-            file.write('')
-        return
+def decode_block(data):
+    if not data:
+        return ''
 
-    pos = 0
+    reader = BitReader(data)
     # Чтение количества символов
-    codebook_size = bits[pos:pos+16].uint
-    pos += 16
+    codebook_size = reader.read(16)
 
     # Чтение символов и длин кодов
     code_lengths = {}
-    sorted_chars = []
     for _ in range(codebook_size):
-        char = chr(bits[pos:pos+16].uint)
-        pos += 16
-        length = bits[pos:pos+5].uint  # Чтение 5 бит вместо 4
-        pos += 5
+        char = chr(reader.read(16))
+        length = reader.read(5)
         if length > 0:  # Игнорируем нулевые длины
             code_lengths[char] = length
-            sorted_chars.append(char)
-
-    # Восстановление канонических кодов
-    codebook = {}
-    current_code = 0
-    sorted_chars.sort(key=lambda c: (code_lengths[c], c))
-    max_length = max(code_lengths.values()) if code_lengths else 0
-    for char in sorted_chars:
-        length = code_lengths[char]
-        code = bin(current_code)[2:].zfill(length)
-        codebook[code] = char
-        current_code = (current_code + 1) << (max_length - length)
-        current_code >>= (max_length - length)
 
     # Чтение длины закодированного текста
-    encoded_text_length = bits[pos:pos+32].uint
-    pos += 32
-
-    # Чтение и декодирование текста
-    encoded_text = bits[pos:pos+encoded_text_length].bin
-    decoded_text = []
-    current_code = ""
-    for bit in encoded_text:
-        current_code += bit
-        if current_code in codebook:
-            decoded_text.append(codebook[current_code])
-            current_code = ""
+    encoded_text_length = reader.read(32)
+    pos = len(data) * 8 - reader.bits_left()
+
+    if encoded_text_length > len(data) * 8 - pos:
+        raise ValueError("Сжатые данные повреждены: поток короче заявленной длины")
+
+    # Восстановление канонических кодов и декодирование таблицей
+    if not encoded_text_length:
+        return ''
+    codes = canonical_codes(code_lengths)
+    table_bits, table, subtables = build_decode_table(codes, code_lengths)
+    return decode_with_table(data, pos, encoded_text_length, table_bits, table, subtables)
+
+
+def encode_byte_block(data, max_code_length=DEFAULT_MAX_CODE_LENGTH):
+    if not 1 <= max_code_length <= MAX_BYTE_CODE_LENGTH:
+        raise ValueError(f"Максимальная длина кода должна быть от 1 до {MAX_BYTE_CODE_LENGTH} бит.")
+    if not data:
+        return bytearray()
+
+    # Частоты байтов считаются прямо по bytes, без декодирования UTF-8
+    freq_map = Counter(data)
+    code_lengths = build_code_lengths(freq_map, max_code_length)
+
+    # Список по значению байта вместо словаря: индексация списка дешевле поиска по ключу
+    bit_codes = _bit_codebook(canonical_codes(code_lengths), code_lengths)
+    codebook = [bit_codes.get(byte, '') for byte in range(BYTE_ALPHABET_SIZE)]
+    encoded_length = sum(freq_map[byte] * code_lengths[byte] for byte in code_lengths)
+
+    output = BitWriter()
+    # Длины кодов всех 256 байтов по 4 бита (0 — байт не встречается)
+    for byte in range(BYTE_ALPHABET_SIZE):
+        output.write(code_lengths.get(byte, 0), 4)
+    # Длина закодированных данных (32 бита)
+    output.write(encoded_length, 32)
+    encode_text(data, codebook, output)
+    return output.getvalue()
+
+
+def decode_byte_block(data):
+    if not data:
+        return b''
+
+    reader = BitReader(data)
+    code_lengths = {}
+    for byte in range(BYTE_ALPHABET_SIZE):
+        length = reader.read(4)
+        if length > 0:
+            code_lengths[byte] = length
+
+    encoded_length = reader.read(32)
+    pos = len(data) * 8 - reader.bits_left()
+
+    if encoded_length > len(data) * 8 - pos:
+        raise ValueError("Сжатые данные повреждены: поток короче заявленной длины")
+    if not encoded_length:
+        return b''
+
+    # В таблице декодера символы хранятся как однобайтовые bytes
+    codes = canonical_codes(code_lengths)
+    byte_codes = {bytes((byte,)): code for byte, code in codes.items()}
+    byte_lengths = {bytes((byte,)): length for byte, length in code_lengths.items()}
+    table_bits, table, subtables = build_decode_table(byte_codes, byte_lengths, b'')
+    return decode_with_table(data, pos, encoded_length, table_bits, table, subtables, b'')
+
+
+def compress_bytes(data, max_code_length=DEFAULT_MAX_CODE_LENGTH):
+    # Сжатие в памяти: bytes/bytearray/memoryview на входе, один байтовый блок на выходе
+    return encode_byte_block(memoryview(data).cast('B'), max_code_length)
+
+
+def decompress_bytes(data):
+    # Обратное к compress_bytes; memoryview разбирается без копирования
+    return decode_byte_block(memoryview(data).cast('B'))
+
+
+def _block_codec(mode):
+    # Режим 'text' — символы Unicode из UTF-8 файла, 'bytes' — байты файла как есть.
+    # Возвращает функции блока и режимы открытия файлов; newline='' отключает
+    # перевод '\r\n' и '\r', чтобы файл восстанавливался байт в байт
+    if mode == 'text':
+        return (encode_block, decode_block, {'mode': 'r', 'encoding': 'utf-8', 'newline': ''},
+                {'mode': 'w', 'encoding': 'utf-8', 'newline': ''})
+    if mode == 'bytes':
+        return encode_byte_block, decode_byte_block, {'mode': 'rb'}, {'mode': 'wb'}
+    raise ValueError(f"Неизвестный режим Хаффмана: {mode}")
+
+
+def compress(input_file, output_file, max_code_length=DEFAULT_MAX_CODE_LENGTH, mode='text'):
+    encode, _, read_options, _ = _block_codec(mode)
+    # Чтение входных данных
+    with open(input_file, **read_options) as file:
+        data = file.read()
+
+    # Запись в файл
+    with open(output_file, 'wb') as file:
+        file.write(encode(data, max_code_length))
+
+
+def decompress(input_file, output_file, mode='text'):
+    _, decode, _, write_options = _block_codec(mode)
+    # Чтение сжатых данных
+    with open(input_file, 'rb') as file:
+        data = file.read()
 
     # Запись результата
-    with open(output_file, 'w', encoding='utf-8') as file:
-        file.write(''.join(decoded_text))
\ No newline at end of file
+    with open(output_file, **write_options) as file:
+        file.write(decode(data))
+
+
+def _iter_text_blocks(chunks, block_size):
+    # Байты UTF-8 декодируются по мере чтения; символ, разрезанный границей
+    # порции, дожидается следующей
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        while len(buffer) >= block_size:
+            yield buffer[:block_size]
+            buffer = buffer[block_size:]
+    buffer += decoder.decode(b'', final=True)
+    if buffer:
+        yield buffer
+
+
+def _iter_byte_blocks(chunks, block_size):
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= block_size:
+            yield bytes(buffer[:block_size])
+            del buffer[:block_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def compress_stream(chunks, block_size=DEFAULT_BLOCK_SIZE, max_code_length=DEFAULT_MAX_CODE_LENGTH, mode='bytes'):
+    # Потоковое сжатие порций байтов: вход режется на блоки по block_size символов
+    # (байтов в режиме 'bytes'), у каждого блока своё дерево и заголовок с длинами
+    # кодов, поэтому память ограничена размером блока. Текст восстанавливается
+    # байт в байт: переводы строк не трогаются.
+    # Формат: BLOCK_STREAM_MAGIC, режим (1 байт), затем
+    # [длина блока в байтах, 32 бита][блок как у compress]...
+    encode, _, _, _ = _block_codec(mode)
+    blocks = _iter_text_blocks(chunks, block_size) if mode == 'text' else _iter_byte_blocks(chunks, block_size)
+    yield BLOCK_STREAM_MAGIC + BLOCK_STREAM_MODES[mode]
+    for data in blocks:
+        block = encode(data, max_code_length)
+        yield len(block).to_bytes(BLOCK_LENGTH_BYTES, 'big') + block
+
+
+def decompress_stream(chunks, mode='bytes'):
+    # Обратное к compress_stream; режим берётся из заголовка потока. Данные без
+    # заголовка считаются одиночным блоком режима mode (файлы compress)
+    buffer = bytearray()
+    chunks = iter(chunks)
+    header_size = len(BLOCK_STREAM_MAGIC) + 1
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= header_size:
+            break
+
+    if buffer[:len(BLOCK_STREAM_MAGIC)] != BLOCK_STREAM_MAGIC:
+        for chunk in chunks:
+            buffer += chunk
+        _, decode, _, _ = _block_codec(mode)
+        result = decode(buffer)
+        yield result.encode('utf-8') if mode == 'text' else result
+        return
+
+    modes = {value: name for name, value in BLOCK_STREAM_MODES.items()}
+    stream_mode = modes.get(bytes(buffer[len(BLOCK_STREAM_MAGIC):header_size]))
+    if stream_mode is None:
+        raise ValueError("Сжатые данные повреждены: неизвестный режим потока блоков")
+    _, decode, _, _ = _block_codec(stream_mode)
+    del buffer[:header_size]
+
+    while True:
+        # Разбираются все блоки, целиком попавшие в буфер
+        start = 0
+        while len(buffer) - start >= BLOCK_LENGTH_BYTES:
+            end = start + BLOCK_LENGTH_BYTES + int.from_bytes(buffer[start:start + BLOCK_LENGTH_BYTES], 'big')
+            if end > len(buffer):
+                break
+            result = decode(bytes(buffer[start + BLOCK_LENGTH_BYTES:end]))
+            yield result.encode('utf-8') if stream_mode == 'text' else result
+            start = end
+        del buffer[:start]
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        buffer += chunk
+
+    if buffer:
+        if len(buffer) < BLOCK_LENGTH_BYTES:
+            raise ValueError("Сжатые данные повреждены: неполный заголовок блока")
+        raise ValueError("Сжатые данные повреждены: блок обрывается")
+
+
+def compress_blocks(input_file, output_file, block_size=DEFAULT_BLOCK_SIZE,
+                    max_code_length=DEFAULT_MAX_CODE_LENGTH, mode='text', chunk_size=DEFAULT_CHUNK_SIZE):
+    # Файловая обёртка над compress_stream: файл читается порциями по chunk_size байт
+    with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+        for data in compress_stream(read_chunks(source, chunk_size), block_size, max_code_length, mode):
+            target.write(data)
+
+
+def decompress_blocks(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Обратное к compress_blocks; режим записан в заголовке потока
+    with open(input_file, 'rb') as source, open(output_file, 'wb') as target:
+        for data in decompress_stream(read_chunks(source, chunk_size)):
+            target.write(data)
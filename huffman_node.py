@@ -1,9 +1,47 @@
-class HuffmanNode:
-    def __init__(self, char, freq):
-        self.char = char
-        self.freq = freq
-        self.left = None
-        self.right = None
-
-    def __lt__(self, other):
-        return self.freq < other.freq
+import heapq
+from array import array
+
+
+class HuffmanTree:
+    # Дерево Хаффмана в параллельных массивах: листья — узлы 0..n-1 в порядке
+    # symbols, внутренние узлы создаются следом, поэтому родитель всегда
+    # имеет больший индекс, чем его потомки, а корень — последний узел
+    __slots__ = ('symbols', 'freq', 'parent', 'left', 'right', 'root')
+
+    def __init__(self, freq_map):
+        self.symbols = list(freq_map)
+        leaf_count = len(self.symbols)
+        node_count = max(2 * leaf_count - 1, 0)
+        self.freq = array('Q', [0]) * node_count
+        self.parent = array('I', [0]) * node_count
+        self.left = array('I', [0]) * node_count
+        self.right = array('I', [0]) * node_count
+
+        heap = []
+        for index, symbol in enumerate(self.symbols):
+            self.freq[index] = freq_map[symbol]
+            heap.append((freq_map[symbol], index))
+        heapq.heapify(heap)
+
+        next_node = leaf_count
+        while len(heap) > 1:
+            left_freq, left = heapq.heappop(heap)
+            right_freq, right = heap[0]
+            merged_freq = left_freq + right_freq
+            self.freq[next_node] = merged_freq
+            self.left[next_node] = left
+            self.right[next_node] = right
+            self.parent[left] = next_node
+            self.parent[right] = next_node
+            heapq.heapreplace(heap, (merged_freq, next_node))
+            next_node += 1
+        self.root = node_count - 1
+
+    def code_lengths(self):
+        # Глубина узла на единицу больше глубины родителя; обход от корня
+        # к листьям по убыванию индексов, без рекурсии
+        depth = array('I', [0]) * len(self.parent)
+        parent = self.parent
+        for node in range(self.root - 1, -1, -1):
+            depth[node] = depth[parent[node]] + 1
+        return {symbol: depth[index] for index, symbol in enumerate(self.symbols)}
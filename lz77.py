@@ -1,53 +1,45 @@
 import re
+import bisect
 import math
 import time
+from bit_io import BitWriter
 
-def bits_to_bytes(bits):
-    """Преобразует список битов в массив байтов."""
-    byte_array = bytearray()
-    for i in range(0, len(bits), 8):
-        byte = bits[i:i + 8]
-        if len(byte) < 8:
-            byte.extend([0] * (8 - len(byte)))
-        byte_value = int(''.join(map(str, byte)), 2)
-        byte_array.append(byte_value)
-    return byte_array
-
-
-def bytes_to_bits(byte_array):
-    """Преобразует массив байтов в список битов."""
-    bits = []
-    for byte in byte_array:
-        bits.extend([int(b) for b in bin(byte)[2:].zfill(8)])
-    return bits
+DEFAULT_MAX_CHAIN_DEPTH = 64
+# Оптимальный разбор не ищет совпадения внутри совпадения длиннее этого
+# (кроме позиции сразу за его началом)
+OPTIMAL_NICE_LENGTH = 32
+MIN_MATCH_LENGTH = 3
+
+
+def _field_widths(window_size, buffer_size):
+    """Возвращает число бит под смещение и под длину совпадения."""
+    offset_bits_count = math.ceil(math.log2(window_size)) if window_size > 0 else 1
+    length_bits_count = math.ceil(math.log2(buffer_size + 1)) if buffer_size > 0 else 1
+    return offset_bits_count, length_bits_count
 
 
-def lz77_compress(text, window_size, buffer_size):
+class BruteForceMatchFinder:
     """
-    Сжимает текст с помощью алгоритма LZ77.
-    Возвращает: словарь с массивом байтов сжатого текста, читаемой последовательностью и статистикой.
+    Полный перебор окна: для каждой позиции окна совпадение продлевается посимвольно.
+    Сложность O(n·window·buffer), оставлен для сравнения и небольших текстов.
     """
-    start_time = time.time()
-
-    compressed_bits = []
-    triples = []
-    encoded_sequence = []
-    i = 0
 
-    offset_bits_count = math.ceil(math.log2(window_size)) if window_size > 0 else 1
-    length_bits_count = math.ceil(math.log2(buffer_size + 1)) if buffer_size > 0 else 1
+    def __init__(self, text, max_offset, buffer_size):
+        self.text = text
+        self.max_offset = max_offset
+        self.buffer_size = buffer_size
 
-    while i < len(text):
+    def longest_match(self, i):
+        text = self.text
         best_length = 0
         best_offset = 0
-        best_char = text[i] if i < len(text) else ''
 
-        window_start = max(0, i - window_size)
+        window_start = max(0, i - self.max_offset)
         window = text[window_start:i]
 
         for j in range(len(window)):
             length = 0
-            while (length < buffer_size and
+            while (length < self.buffer_size and
                    i + length < len(text) and
                    j + length < len(window) and
                    window[j + length] == text[i + length]):
@@ -56,46 +48,428 @@ def lz77_compress(text, window_size, buffer_size):
             if length > best_length:
                 best_length = length
                 best_offset = i - (j + window_start)
-                best_char = text[i + length] if i + length < len(text) else ''
-
-        if best_length > 0:
-            compressed_bits.append(1)
-            offset_bits = bin(best_offset)[2:].zfill(offset_bits_count)
-            compressed_bits.extend(map(int, offset_bits))
-            length_bits = bin(best_length)[2:].zfill(length_bits_count)
-            compressed_bits.extend(map(int, length_bits))
-            if best_char:
-                char_bits = bin(ord(best_char))[2:].zfill(8)
-                compressed_bits.extend(map(int, char_bits))
-            triples.append((best_offset, best_length, best_char))
-            encoded_sequence.append(f"({best_offset},{best_length},{best_char})")
-            i += best_length + 1
+
+        return best_length, best_offset
+
+
+class HashChainMatchFinder:
+    """
+    Поиск совпадений по хеш-цепочкам, ключ — следующие MIN_MATCH_LENGTH символов.
+    head хранит последнюю позицию для каждого ключа, prev — предыдущую позицию
+    с тем же ключом. Просматривается не больше max_chain_depth кандидатов.
+    """
+
+    def __init__(self, text, max_offset, buffer_size, max_chain_depth=DEFAULT_MAX_CHAIN_DEPTH):
+        self.text = text
+        self.max_offset = max_offset
+        self.buffer_size = buffer_size
+        self.max_chain_depth = max_chain_depth
+        self.head = {}
+        self.prev = [-1] * len(text)
+        self.next_insert = 0
+
+    def _insert_until(self, end):
+        text = self.text
+        head = self.head
+        prev = self.prev
+        last = min(end, len(text) - MIN_MATCH_LENGTH + 1)
+        for pos in range(self.next_insert, last):
+            key = text[pos:pos + MIN_MATCH_LENGTH]
+            prev[pos] = head.get(key, -1)
+            head[key] = pos
+        if end > self.next_insert:
+            self.next_insert = end
+
+    def longest_match(self, i):
+        text = self.text
+        self._insert_until(i)
+
+        max_length = min(self.buffer_size, len(text) - i)
+        best_length = 0
+        best_offset = 0
+        if max_length >= MIN_MATCH_LENGTH:
+            window_start = i - self.max_offset
+            candidate = self.head.get(text[i:i + MIN_MATCH_LENGTH], -1)
+            depth = self.max_chain_depth
+            while candidate >= 0 and candidate >= window_start and depth > 0:
+                depth -= 1
+                # Быстрая отсечка: кандидат не может быть длиннее текущего лучшего
+                if text[candidate + best_length] == text[i + best_length]:
+                    length = MIN_MATCH_LENGTH
+                    while length < max_length and text[candidate + length] == text[i + length]:
+                        length += 1
+                    if length > best_length:
+                        best_length = length
+                        best_offset = i - candidate
+                        if length == max_length:
+                            break
+                candidate = self.prev[candidate]
+
+        self._insert_until(i + 1)
+        return best_length, best_offset
+
+
+class BinaryTreeMatchFinder:
+    """
+    Поиск совпадений по двоичному дереву суффиксов окна (как bt-режим LZMA).
+    Для каждого ключа из MIN_MATCH_LENGTH символов хранится своё дерево, корнем
+    которого всегда становится текущая позиция, поэтому при спуске позиции
+    только стареют и выход за окно обрывает поиск. Находит самое длинное
+    совпадение в окне примерно за O(log window) сравнений на позицию.
+    """
+
+    def __init__(self, text, max_offset, buffer_size):
+        self.text = text
+        self.max_offset = max_offset
+        self.buffer_size = buffer_size
+        self.cyclic_size = max_offset + 1
+        # Для узла pos: son[2*k] — левый (меньший) потомок, son[2*k+1] — правый
+        self.son = [-1] * (2 * self.cyclic_size)
+        self.head = {}
+        self.next_insert = 0
+
+    def _insert(self, pos):
+        """Вставляет суффикс pos в дерево и возвращает лучшее найденное совпадение."""
+        text = self.text
+        son = self.son
+        length_limit = min(self.buffer_size, len(text) - pos)
+        if length_limit < MIN_MATCH_LENGTH:
+            return 0, 0
+
+        key = text[pos:pos + MIN_MATCH_LENGTH]
+        candidate = self.head.get(key, -1)
+        self.head[key] = pos
+
+        node = 2 * (pos % self.cyclic_size)
+        left_slot = node
+        right_slot = node + 1
+        # Длины общих префиксов с левой и правой границами поддерева
+        left_length = right_length = MIN_MATCH_LENGTH
+        best_length = 0
+        best_offset = 0
+
+        while candidate >= 0 and pos - candidate <= self.max_offset:
+            candidate_node = 2 * (candidate % self.cyclic_size)
+            length = min(left_length, right_length)
+            while length < length_limit and text[candidate + length] == text[pos + length]:
+                length += 1
+
+            if length > best_length:
+                best_length = length
+                best_offset = pos - candidate
+
+            if length == length_limit:
+                # Кандидат совпадает полностью: pos занимает его место в дереве
+                son[left_slot] = son[candidate_node]
+                son[right_slot] = son[candidate_node + 1]
+                return best_length, best_offset
+
+            if text[candidate + length] < text[pos + length]:
+                son[left_slot] = candidate
+                left_slot = candidate_node + 1
+                candidate = son[left_slot]
+                left_length = length
+            else:
+                son[right_slot] = candidate
+                right_slot = candidate_node
+                candidate = son[right_slot]
+                right_length = length
+
+        son[left_slot] = -1
+        son[right_slot] = -1
+        return best_length, best_offset
+
+    def longest_match(self, i):
+        # Позиции внутри предыдущего совпадения тоже должны попасть в дерево
+        for pos in range(self.next_insert, i):
+            self._insert(pos)
+        self.next_insert = i + 1
+        return self._insert(i)
+
+
+def _create_match_finder(match_finder, text, max_offset, buffer_size, max_chain_depth):
+    """Создаёт поисковик совпадений по его имени."""
+    if match_finder == 'hash_chain':
+        return HashChainMatchFinder(text, max_offset, buffer_size, max_chain_depth)
+    if match_finder == 'binary_tree':
+        return BinaryTreeMatchFinder(text, max_offset, buffer_size)
+    if match_finder == 'brute':
+        return BruteForceMatchFinder(text, max_offset, buffer_size)
+    raise ValueError(f"Неизвестный способ поиска совпадений: {match_finder}")
+
+
+def _parse_greedy(finder, size, match_bits):
+    """Жадный разбор: на каждой позиции берётся самое длинное совпадение."""
+    i = 0
+    while i < size:
+        length, offset = finder.longest_match(i)
+        yield offset, length
+        i += length + 1
+
+
+def _parse_lazy(finder, size, match_bits):
+    """
+    Ленивый разбор (как в zlib): если с позиции i + 1 совпадение длиннее,
+    символ i выводится литералом, а совпадение берётся со следующей позиции.
+    """
+    i = 0
+    ahead = None
+    while i < size:
+        length, offset = ahead if ahead is not None else finder.longest_match(i)
+        ahead = None
+        if length and i + 1 < size:
+            # Результат для i + 1 сохраняется: повторный поиск испортил бы двоичное дерево
+            ahead = finder.longest_match(i + 1)
+            if ahead[0] > length:
+                yield 0, 0
+                i += 1
+                continue
+            ahead = None
+        yield offset, length
+        i += length + 1
+
+
+def _parse_optimal(finder, size, match_bits):
+    """
+    Оптимальный разбор по точной цене формата в битах: литерал — 9 бит,
+    тройка — match_bits (без символа в самом конце на 8 бит меньше).
+    Сначала ищется самое длинное совпадение для каждой позиции, затем
+    динамика с конца: cost[i] — минимальная цена кодирования data[i:].
+    Годится любой префикс совпадения, поэтому нужен минимум cost на отрезке
+    [i + 2, i + length + 1]; его даёт монотонный стек с двоичным поиском.
+    """
+    lengths = [0] * size
+    offsets = [0] * size
+    length = offset = 0
+    skip = False
+    for i in range(size):
+        if skip and length > OPTIMAL_NICE_LENGTH:
+            # Внутри длинного совпадения его хвост с тем же смещением почти всегда
+            # самый длинный, а поиск на каждой позиции стоил бы больше всего разбора
+            length -= 1
         else:
-            compressed_bits.append(0)
-            char_bits = bin(ord(best_char))[2:].zfill(8)
-            compressed_bits.extend(map(int, char_bits))
-            triples.append((0, 0, best_char))
-            encoded_sequence.append(f"(0,0,{best_char})")
-            i += 1
+            tail, tail_offset = length - 1, offset
+            length, offset = finder.longest_match(i)
+            if tail > length:
+                length, offset = tail, tail_offset
+            # Сразу после нового длинного совпадения ищется ещё и следующая позиция:
+            # как в ленивом разборе, с неё может начинаться совпадение длиннее
+            skip = tail > OPTIMAL_NICE_LENGTH
+        lengths[i] = length
+        offsets[i] = offset
+
+    literal_bits = 9
+    cost = [0] * (size + 2)
+    choice = [0] * size
+    # Позиции по убыванию и их цены по возрастанию: позиция, которую не
+    # берут ни в один отрезок, вытесняется левее стоящей не дороже её
+    stack_positions = []
+    stack_costs = []
+    for i in range(size - 1, -1, -1):
+        position = i + 2
+        if position <= size:
+            position_cost = cost[position]
+            while stack_costs and stack_costs[-1] >= position_cost:
+                stack_costs.pop()
+                stack_positions.pop()
+            stack_positions.append(-position)
+            stack_costs.append(position_cost)
+
+        best = literal_bits + cost[i + 1]
+        best_length = 0
+        length = lengths[i]
+        if length:
+            if i + length == size and match_bits - 8 < best:
+                # Совпадение до самого конца: символ после него не пишется
+                best = match_bits - 8
+                best_length = length
+            last = min(length, size - i - 1)
+            if last > 0:
+                k = bisect.bisect_left(stack_positions, -(i + last + 1))
+                candidate = match_bits + stack_costs[k]
+                if candidate < best:
+                    best = candidate
+                    best_length = -stack_positions[k] - i - 1
+        cost[i] = best
+        choice[i] = best_length
 
-    while len(compressed_bits) % 8 != 0:
-        compressed_bits.append(0)
+    i = 0
+    while i < size:
+        length = choice[i]
+        yield (offsets[i] if length else 0), length
+        i += length + 1
 
-    compressed_bytes = bits_to_bytes(compressed_bits)
+
+def _parse_bits(parsed, size, match_bits):
+    """Размер разбора в битах: литерал — 9 бит, тройка — match_bits (в самом конце без символа)."""
+    bits = 0
+    i = 0
+    for _, length in parsed:
+        i += length + 1
+        if not length:
+            bits += 9
+        elif i > size:
+            bits += match_bits - 8
+        else:
+            bits += match_bits
+    return bits
+
+
+_PARSERS = {
+    'greedy': _parse_greedy,
+    'lazy': _parse_lazy,
+    'optimal': _parse_optimal,
+}
+
+# Уровни сжатия: (поиск совпадений, глубина хеш-цепочки, разбор).
+# Чем выше уровень, тем меньше результат и медленнее сжатие; распаковка от уровня не зависит
+COMPRESSION_LEVELS = {
+    1: ('hash_chain', 8, 'greedy'),
+    2: ('hash_chain', DEFAULT_MAX_CHAIN_DEPTH, 'greedy'),
+    3: ('hash_chain', DEFAULT_MAX_CHAIN_DEPTH, 'lazy'),
+    4: ('hash_chain', DEFAULT_MAX_CHAIN_DEPTH, 'optimal'),
+    5: ('binary_tree', DEFAULT_MAX_CHAIN_DEPTH, 'optimal'),
+}
+
+
+def level_settings(level):
+    """Возвращает словарь match_finder, max_chain_depth и parse для уровня сжатия."""
+    if level not in COMPRESSION_LEVELS:
+        raise ValueError(f"Неизвестный уровень сжатия: {level}, доступны {min(COMPRESSION_LEVELS)}–{max(COMPRESSION_LEVELS)}")
+    match_finder, max_chain_depth, parse = COMPRESSION_LEVELS[level]
+    return {'match_finder': match_finder, 'max_chain_depth': max_chain_depth, 'parse': parse}
+
+
+def _lz77_encode(data, window_size, buffer_size, match_finder, max_chain_depth, parse='greedy', triples=None):
+    """
+    Кодирует data тройками LZ77 в битовый поток.
+    data — bytes; литерал — сам байт, поэтому 8 бит хватает всегда.
+    parse — способ разбора: 'greedy', 'lazy' или 'optimal'.
+    Если передан triples (список или TokenStreamWriter), в него складываются
+    тройки (смещение, длина, байт); у последней тройки байта может не быть (None).
+    Возвращает: (массив байтов, число троек).
+    """
+    if parse not in _PARSERS:
+        raise ValueError(f"Неизвестный способ разбора: {parse}")
+
+    writer = BitWriter()
+    size = len(data)
+    num_triples = 0
+    i = 0
+
+    offset_bits_count, length_bits_count = _field_widths(window_size, buffer_size)
+    # Смещение должно помещаться в offset_bits_count бит
+    max_offset = min(window_size, (1 << offset_bits_count) - 1)
+    match_bits = 1 + offset_bits_count + length_bits_count + 8
+
+    finder = _create_match_finder(match_finder, data, max_offset, buffer_size, max_chain_depth)
+    parsed = _PARSERS[parse](finder, size, match_bits)
+    if parse == 'optimal':
+        # Пропуск поиска внутри длинных совпадений изредка проигрывает ленивому разбору;
+        # сравнение по цене в битах гарантирует, что оптимальный разбор не хуже ленивого.
+        # Ленивый разбор всегда идёт по хеш-цепочкам: с двоичным деревом он стоил бы
+        # почти столько же, сколько весь оптимальный
+        parsed = list(parsed)
+        lazy_finder = _create_match_finder('hash_chain', data, max_offset, buffer_size, max_chain_depth)
+        lazy = list(_parse_lazy(lazy_finder, size, match_bits))
+        if _parse_bits(lazy, size, match_bits) < _parse_bits(parsed, size, match_bits):
+            parsed = lazy
+
+    # Тройка (смещение, длина) покрывает length символов совпадения и следующий за ним символ
+    for offset, length in parsed:
+        has_char = i + length < size
+        char = data[i + length] if has_char else None
+
+        if length > 0:
+            writer.write(1, 1)
+            writer.write(offset, offset_bits_count)
+            writer.write(length, length_bits_count)
+            if has_char:
+                writer.write(char, 8)
+        else:
+            writer.write(0, 1)
+            writer.write(char, 8)
+        i += length + 1
+        num_triples += 1
+        if triples is not None:
+            triples.append((offset, length, char))
+
+    return writer.getvalue(), num_triples
+
+
+def lz77_compress_bytes(data, window_size, buffer_size, match_finder='hash_chain',
+                        max_chain_depth=DEFAULT_MAX_CHAIN_DEPTH, parse='greedy'):
+    """
+    Сжимает байтовые данные (bytes, bytearray, memoryview) алгоритмом LZ77.
+    Аргументы те же, что у lz77_compress; читаемая последовательность не строится.
+    Возвращает: словарь с массивом байтов сжатых данных и статистикой.
+    """
+    start_time = time.time()
+
+    # Поисковикам нужны хешируемые срезы, поэтому изменяемый буфер копируется один раз
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    compressed_bytes, num_triples = _lz77_encode(data, window_size, buffer_size, match_finder,
+                                                 max_chain_depth, parse)
+
+    compression_time = round((time.time() - start_time) * 1000)
+
+    original_size = len(data)
+    compressed_size = len(compressed_bytes)
+    compression_ratio = round(((original_size - compressed_size) / original_size * 100)) if original_size > 0 else 0
+
+    return {
+        'compressed_bytes': compressed_bytes,
+        'original_size': original_size,
+        'compressed_size': compressed_size,
+        'compression_ratio': compression_ratio,
+        'compression_time': compression_time,
+        'num_triples': num_triples
+    }
+
+
+def lz77_compress(text, window_size, buffer_size, match_finder='hash_chain',
+                  max_chain_depth=DEFAULT_MAX_CHAIN_DEPTH, parse='greedy', with_tokens=False,
+                  with_sequence=False):
+    """
+    Сжимает текст с помощью алгоритма LZ77.
+    Текст сжимается как байты UTF-8, поэтому годится любой язык; окно, длины
+    и литералы в тройках считаются в байтах.
+    Аргументы:
+        text: исходный текст
+        window_size: размер окна поиска
+        buffer_size: размер буфера предпросмотра (максимальная длина совпадения)
+        match_finder: способ поиска совпадений — 'hash_chain' (быстро),
+            'binary_tree' (самое длинное совпадение в окне, медленнее) или 'brute'
+        max_chain_depth: максимальное число кандидатов в хеш-цепочке
+        parse: способ разбора — 'greedy' (жадный), 'lazy' (ленивый, на шаг вперёд)
+            или 'optimal' (минимум бит по цене формата); готовые сочетания — в COMPRESSION_LEVELS
+        with_tokens: добавить в результат двоичный поток троек token_bytes (см. tokens_to_bytes)
+        with_sequence: добавить читаемую последовательность encoded_sequence — она в разы
+            больше исходного текста, поэтому строится только по запросу
+    Возвращает: словарь с массивом байтов сжатого текста и статистикой.
+    Если ничего дополнительного не запрошено, тройки не сохраняются вовсе.
+    """
+    start_time = time.time()
+
+    # Тройки сразу пишутся в двоичный поток; читаемая запись строится из него же
+    tokens = TokenStreamWriter() if with_tokens or with_sequence else None
+    data = text.encode('utf-8')
+    compressed_bytes, num_triples = _lz77_encode(data, window_size, buffer_size, match_finder,
+                                                 max_chain_depth, parse, tokens)
 
     end_time = time.time()
     compression_time = round((end_time - start_time) * 1000)
 
     # Статистика
-    original_size = len(text.encode('utf-8'))
-    num_triples = len(triples)
+    offset_bits_count, length_bits_count = _field_widths(window_size, buffer_size)
+    original_size = len(data)
     approx_label_bits = num_triples * (offset_bits_count + length_bits_count + 8)
     approx_label_bytes = round(approx_label_bits / 8)
     compression_ratio = round(((original_size - approx_label_bytes) / original_size * 100)) if original_size > 0 else 0
 
-    return {
+    result = {
         'compressed_bytes': compressed_bytes,
-        'encoded_sequence': " ".join(encoded_sequence),
         'original_size': original_size,
         'compressed_size': approx_label_bytes,
         'compression_ratio': compression_ratio,
@@ -103,134 +477,331 @@ def lz77_compress(text, window_size, buffer_size):
         'num_triples': num_triples,
         'approx_label_bits': approx_label_bits
     }
+    if with_tokens:
+        result['token_bytes'] = tokens.buffer
+    if with_sequence:
+        result['encoded_sequence'] = tokens_to_sequence(iter_tokens(tokens.buffer))
+    return result
+
+
+def lz77_decompress_bytes(compressed_bytes, window_size, buffer_size):
+    """
+    Декомпрессирует данные, сжатые алгоритмом LZ77, в байты.
+    Аргументы:
+        compressed_bytes: сжатые данные (bytes, bytearray или memoryview)
+        window_size: размер окна поиска
+        buffer_size: размер буфера предпросмотра
+    Возвращает: словарь с восстановленными байтами и статистикой.
+    """
+    start_time = time.time()
+
+    data = compressed_bytes
+    data_size = len(data)
+    offset_bits_count, length_bits_count = _field_widths(window_size, buffer_size)
+    offset_mask = (1 << offset_bits_count) - 1
+    length_mask = (1 << length_bits_count) - 1
+    field_bits = offset_bits_count + length_bits_count
+    token_bits = 1 + field_bits + 8
+
+    # Выход выделяется заранее и растёт удвоением, лишний хвост отрезается в конце.
+    # Совпадение копируется одним срезом; если оно перекрывает само себя
+    # (offset < length), повторяется образец из последних offset байт
+    output = bytearray(max(data_size * 4, 64))
+    pos = 0
+
+    # Биты читаются прямо в цикле (как в BitReader, но без вызовов методов):
+    # в acc лежат count непрочитанных битов, подгрузка — по 8 байт
+    acc = 0
+    count = 0
+    byte_pos = 0
+
+    while True:
+        if count < token_bits:
+            while count < token_bits and byte_pos < data_size:
+                chunk = data[byte_pos:byte_pos + 8]
+                byte_pos += len(chunk)
+                acc = ((acc & ((1 << count) - 1)) << (8 * len(chunk))) | int.from_bytes(chunk, 'big')
+                count += 8 * len(chunk)
+            # Если подгружать больше нечего, count — это все оставшиеся биты
+            if count == 0:
+                break
+
+        count -= 1
+        if (acc >> count) & 1:
+            if count < field_bits:
+                break
+            count -= offset_bits_count
+            offset = (acc >> count) & offset_mask
+            count -= length_bits_count
+            length = (acc >> count) & length_mask
+
+            if length > 0:
+                if offset == 0 or offset > pos:
+                    raise ValueError(f"Смещение {offset} выходит за пределы результата длиной {pos}")
+                end = pos + length
+                if end >= len(output):
+                    output += bytes(max(len(output), length + 1))
+                start = pos - offset
+                if offset >= length:
+                    output[pos:end] = output[start:start + length]
+                else:
+                    output[pos:end] = (output[start:pos] * (length // offset + 1))[:length]
+                pos = end
+            # Символа нет только у последней тройки: после неё остаются лишь биты выравнивания
+            if count < 8:
+                break
+        elif count < 8:
+            break
+
+        count -= 8
+        if pos >= len(output):
+            output += bytes(len(output))
+        output[pos] = (acc >> count) & 0xFF
+        pos += 1
+
+    del output[pos:]
+
+    end_time = time.time()
+    decompression_time = end_time - start_time
+
+    return {
+        'decompressed_bytes': output,
+        'decompression_time': decompression_time,
+        'compressed_size': len(compressed_bytes),
+        'decompressed_size': len(output)
+    }
+
+def _decode_text(data, legacy=False):
+    """
+    Декодирует восстановленные байты как UTF-8; некорректный UTF-8 — это
+    повреждённый поток или чужие параметры окна, поэтому ValueError.
+    legacy: данные старого формата, где литерал — код символа до 255 (latin-1).
+    """
+    if legacy:
+        return data.decode('latin-1')
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise ValueError("Восстановленные данные — не текст UTF-8: поток повреждён "
+                         "или размеры окна и буфера не совпадают") from e
+
 
-def lz77_decompress(compressed_bytes, window_size, buffer_size):
+def lz77_decompress(compressed_bytes, window_size, buffer_size, legacy=False):
     """
-    Декомпрессирует данные, сжатые алгоритмом LZ77.
+    Декомпрессирует данные, сжатые алгоритмом LZ77 из текста (см. lz77_decompress_bytes).
     Аргументы:
         compressed_bytes: массив байтов сжатого текста
         window_size: размер окна поиска
         buffer_size: размер буфера предпросмотра
+        legacy: поток записан до перехода на UTF-8 (литерал — код символа latin-1)
     Возвращает: словарь с восстановленным текстом и статистикой.
     """
-    start_time = time.time()
+    result = lz77_decompress_bytes(compressed_bytes, window_size, buffer_size)
+    result['decompressed_text'] = _decode_text(result.pop('decompressed_bytes'), legacy)
+    return result
 
-    bits = bytes_to_bits(compressed_bytes)
 
-    offset_bits_count = math.ceil(math.log2(window_size)) if window_size > 0 else 1
-    length_bits_count = math.ceil(math.log2(buffer_size + 1)) if buffer_size > 0 else 1
+# Двоичный поток троек для текстового режима (вместо читаемой строки '(offset,length,symbol)').
+# Каждая тройка — целые в формате varint (по 7 бит, старший бит — «продолжение»):
+# length << 1 | есть_байт, затем offset (только если length > 0), затем байт литерала.
+# Литерал занимает 2–3 байта против 8 и более символов читаемой записи.
+TOKEN_STREAM_MAGIC = b'LZT2'
+# Первая версия потока: литерал — код символа Unicode, смещения и длины — в символах
+LEGACY_TOKEN_STREAM_MAGIC = b'LZT1'
 
-    output = []
-    bit_index = 0
 
-    while bit_index < len(bits):
-        flag = bits[bit_index]
-        bit_index += 1
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
 
-        if flag == 1:
-            if bit_index + offset_bits_count > len(bits):
-                break
-            offset_bits = bits[bit_index:bit_index + offset_bits_count]
-            offset = int(''.join(map(str, offset_bits)), 2)
-            bit_index += offset_bits_count
 
-            if bit_index + length_bits_count > len(bits):
-                break
-            length_bits = bits[bit_index:bit_index + length_bits_count]
-            length = int(''.join(map(str, length_bits)), 2)
-            bit_index += length_bits_count
+def _read_varint(view, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
 
-            next_char = ''
-            if bit_index + 8 <= len(bits):
-                char_bits = bits[bit_index:bit_index + 8]
-                char_code = int(''.join(map(str, char_bits)), 2)
-                next_char = chr(char_code) if char_code != 0 else ''
-                bit_index += 8
 
-            if length > 0:
-                start = len(output) - offset
-                for i in range(length):
-                    if start + i < len(output):
-                        output.append(output[start + i])
-                    else:
-                        break
-            if next_char:
-                output.append(next_char)
+class TokenStreamWriter:
+    """Дописывает тройки в двоичный поток по одной, не храня их списком."""
 
-        else:
-            if bit_index + 8 > len(bits):
-                break
-            char_bits = bits[bit_index:bit_index + 8]
-            char_code = int(''.join(map(str, char_bits)), 2)
-            output.append(chr(char_code))
-            bit_index += 8
+    def __init__(self):
+        self.buffer = bytearray(TOKEN_STREAM_MAGIC)
 
-    decompressed_text = ''.join(output)
-    end_time = time.time()
-    decompression_time = end_time - start_time
+    def append(self, triple):
+        offset, length, char = triple
+        _write_varint(self.buffer, length << 1 | (char is not None))
+        if length:
+            _write_varint(self.buffer, offset)
+        if char is not None:
+            _write_varint(self.buffer, char)
 
-    # Вычисляем статистику
-    compressed_size = len(compressed_bytes)
-    decompressed_size = len(decompressed_text.encode('utf-8'))
+
+def tokens_to_bytes(triples):
+    """Сериализует тройки (смещение, длина, байт или None) в компактный двоичный поток."""
+    writer = TokenStreamWriter()
+    for triple in triples:
+        writer.append(triple)
+    return writer.buffer
+
+
+def iter_tokens(data):
+    """
+    Читает тройки из двоичного потока tokens_to_bytes без копирования данных:
+    разбор идёт прямо по memoryview. Возвращает генератор (смещение, длина, байт или None).
+    """
+    view = memoryview(data).cast('B')
+    if view[:len(TOKEN_STREAM_MAGIC)] not in (TOKEN_STREAM_MAGIC, LEGACY_TOKEN_STREAM_MAGIC):
+        raise ValueError("Это не двоичный поток троек LZ77")
+    pos = len(TOKEN_STREAM_MAGIC)
+    size = len(view)
+    try:
+        while pos < size:
+            header, pos = _read_varint(view, pos)
+            length = header >> 1
+            offset = 0
+            if length:
+                offset, pos = _read_varint(view, pos)
+            char = None
+            if header & 1:
+                char, pos = _read_varint(view, pos)
+            yield offset, length, char
+    except IndexError:
+        raise ValueError("Двоичный поток троек LZ77 обрывается на середине") from None
+
+
+def _sequence_symbol(char):
+    """Литерал читаемой записи: печатный ASCII как есть, остальные байты — как \\xNN."""
+    if char is None:
+        return ''
+    if 0x20 <= char < 0x7F and char != 0x5C:
+        return chr(char)
+    return f'\\x{char:02x}'
+
+
+def _parse_sequence_symbol(symbol):
+    """Обратное к _sequence_symbol: байт литерала или None для пустого символа."""
+    if not symbol:
+        return None
+    if len(symbol) == 4:
+        return int(symbol[2:], 16)
+    return ord(symbol)
+
+
+def tokens_to_sequence(triples):
+    """
+    Читаемая запись троек '(offset,length,symbol) ...' — только для отладки и показа.
+    Байты вне печатного ASCII (в том числе байты UTF-8 не-латинских букв, управляющие
+    символы и обратная косая черта) записываются как \\xNN: иначе поле ввода
+    подменяет их (например, байт A0 из «Р» превращается в обычный пробел).
+    """
+    return " ".join(f"({offset},{length},{_sequence_symbol(char)})" for offset, length, char in triples)
+
+
+def _expand_triples(triples, output):
+    """
+    Восстанавливает данные из троек (смещение, длина, литерал) в output и
+    возвращает число троек. output — bytearray для байтов или список для
+    символов; литерал None (конец данных) пропускается.
+    """
+    num_triples = 0
+    for offset, length, symbol in triples:
+        num_triples += 1
+        if offset > len(output) or (length > 0 and offset == 0):
+            raise ValueError(f"Offset {offset} выходит за пределы результата длиной {len(output)}")
+
+        if length > 0:
+            start = len(output) - offset
+            if offset >= length:
+                output.extend(output[start:start + length])
+            else:
+                # Перекрывающееся совпадение: повторяется образец из последних offset элементов
+                output.extend((output[start:] * (length // offset + 1))[:length])
+
+        if symbol is not None:
+            output.append(symbol)
+    return num_triples
+
+
+def lz77_decompress_tokens(token_bytes):
+    """
+    Декомпрессирует текст из двоичного потока троек (см. tokens_to_bytes).
+    Возвращает: словарь с восстановленным текстом и статистикой.
+    """
+    start_time = time.time()
+
+    if bytes(token_bytes[:len(LEGACY_TOKEN_STREAM_MAGIC)]) == LEGACY_TOKEN_STREAM_MAGIC:
+        # Старая версия потока: литералы — коды символов
+        output = []
+        num_triples = _expand_triples(((offset, length, None if char is None else chr(char))
+                                       for offset, length, char in iter_tokens(token_bytes)), output)
+        result = ''.join(output)
+    else:
+        output = bytearray()
+        num_triples = _expand_triples(iter_tokens(token_bytes), output)
+        result = _decode_text(output)
 
     return {
-        'decompressed_text': decompressed_text,
-        'decompression_time': decompression_time,
-        'compressed_size': compressed_size,
-        'decompressed_size': decompressed_size
+        'decompressed_text': result,
+        'decompression_time': (time.time() - start_time) * 1000,
+        'compressed_size': len(token_bytes),
+        'decompressed_size': len(result.encode('utf-8')),
+        'num_triples': num_triples
     }
 
-def lz77_decompress_from_sequence(sequence: str, window_size: int, buffer_size: int):
+
+def lz77_decompress_from_sequence(sequence: str, window_size: int, buffer_size: int, legacy: bool = False):
     """
     Декомпрессирует данные из читаемой последовательности троек LZ77.
+    Оставлена для отладки: обычный путь — двоичный поток и lz77_decompress_tokens.
     Аргументы:
         sequence: строка вида '(offset,length,symbol) ...'
         window_size: размер окна поиска
         buffer_size: размер буфера предпросмотра
+        legacy: запись старого формата, где symbol — сам символ, а смещения
+            считаются в символах (по умолчанию symbol — байт UTF-8, см. tokens_to_sequence)
     Возвращает: словарь с восстановленным текстом и статистикой.
     """
     start_time = time.time()
 
-    pattern = r'\((\d+),(\d+),([^\)]*)\)'
-    matches = re.findall(pattern, sequence)
+    # Символ — экранированный байт \xNN, любой один знак, в том числе ')' и перевод строки,
+    # или пусто в последней тройке; в записи старого формата экранирования нет
+    pattern = r'\((\d+),(\d+),(.?)\)' if legacy else r'\((\d+),(\d+),(\\x[0-9a-fA-F]{2}|.?)\)'
+    matches = re.findall(pattern, sequence, re.DOTALL)
 
     if not matches:
         raise ValueError("Формат последовательности некорректен")
 
-    offset_bits_count = math.ceil(math.log2(window_size)) if window_size > 0 else 1
-    length_bits_count = math.ceil(math.log2(buffer_size + 1)) if buffer_size > 0 else 1
-
-    result = ''
-    for offset, length, symbol in matches:
-        offset = int(offset)
-        length = int(length)
-
-        if offset > len(result):
-            raise ValueError(f"Offset {offset} выходит за пределы результата длиной {len(result)}")
-
-        start = len(result) - offset
-        for _ in range(length):
-            if start < len(result):  # Проверка на выход за пределы
-                result += result[start]
-                start += 1
-            else:
-                break
-
-        result += symbol
+    offset_bits_count, length_bits_count = _field_widths(window_size, buffer_size)
+
+    if legacy:
+        output = []
+        num_triples = _expand_triples(((int(offset), int(length), symbol or None)
+                                       for offset, length, symbol in matches), output)
+        result = ''.join(output)
+    else:
+        # Символы — байты UTF-8: печатный ASCII как есть, остальные — \xNN (см. tokens_to_sequence)
+        if any(symbol > '\xff' for _, _, symbol in matches):
+            raise ValueError("Символ вне диапазона байта: для записи старого формата укажите legacy=True")
+        output = bytearray()
+        num_triples = _expand_triples(((int(offset), int(length), _parse_sequence_symbol(symbol))
+                                       for offset, length, symbol in matches), output)
+        result = _decode_text(output)
 
     # Вычисляем compressed_size, как в lz77_compress
-    num_triples = len(matches)
     approx_label_bits = num_triples * (offset_bits_count + length_bits_count + 8)
-    compressed_size = len(bits_to_bytes([0] * approx_label_bits))  # Реальный размер после padding
-
-    # Отладочный вывод для проверки
-    print(f"Debug: num_triples={num_triples}, offset_bits_count={offset_bits_count}, "
-          f"length_bits_count={length_bits_count}, approx_label_bits={approx_label_bits}, "
-          f"compressed_size={compressed_size}")
+    compressed_size = math.ceil(approx_label_bits / 8)  # Реальный размер после padding
 
     return {
         'decompressed_text': result,
         'decompression_time': (time.time() - start_time) * 1000,
         'compressed_size': compressed_size,  # Теперь совпадает с lz77_compress
         'decompressed_size': len(result.encode('utf-8')),
-    }
\ No newline at end of file
+    }
@@ -1,8 +1,11 @@
 import sys
+import multiprocessing
 from PyQt5 import QtWidgets
 from main_window import MainWindow
 
 if __name__ == "__main__":
+    # Процессы сжатия в собранном exe запускаются через этот же файл
+    multiprocessing.freeze_support()
     app = QtWidgets.QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -1,14 +1,29 @@
+import base64
+import binascii
 import zipfile
 import os
 import sys
+import threading
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 from design import Ui_Dialog
-from huffman_coding import compress as huffman_compress, decompress as huffman_decompress
-from lz77 import lz77_compress, lz77_decompress_from_sequence
-from deflate import deflate_compress, deflate_decompress
-from BrotliComp import brotli_compress, brotli_decompress
-import time
+from lz77 import lz77_compress, lz77_decompress_from_sequence, lz77_decompress_tokens
+from deflate import framing_wbits, FRAMINGS, STRATEGIES, DEFAULT_LEVEL
+from codec import get_codec
+from container import is_container, pack_bytes, pack_file, unpack_file
+
+# Блоки контейнера для LZ77 и Хаффмана: они написаны на чистом Python, а прогресс
+# и отмена срабатывают только между блоками
+GUI_BLOCK_SIZE = 256 * 1024
+# Большие файлы для них сжимаются в процессах, по одному на ядро; запуск процессов
+# стоит заметно дороже сжатия небольшого файла
+GUI_WORKERS = os.cpu_count() or 1
+GUI_PARALLEL_MIN_SIZE = 16 * 1024 * 1024
+
+
+def pack_workers(input_file):
+    """Число процессов для упаковки файла: параллельно — только большие файлы."""
+    return GUI_WORKERS if os.path.getsize(input_file) >= GUI_PARALLEL_MIN_SIZE else 1
 
 
 class CustomTextEdit(QtWidgets.QTextEdit):
@@ -32,6 +47,55 @@ class CustomTextEdit(QtWidgets.QTextEdit):
             super().insertFromMimeData(source)
 
 
+class TaskCancelled(Exception):
+    """Операция прервана кнопкой «Отмена»."""
+
+
+class TaskSignals(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+
+class CodecTask(QtCore.QRunnable):
+    """
+    Выполняет work(progress) в пуле потоков Qt, чтобы окно не зависало.
+    work вызывает progress(done, total) между блоками данных; после cancel()
+    очередной вызов прерывает работу исключением TaskCancelled.
+    Результат и ошибки возвращаются в поток интерфейса сигналами.
+    """
+
+    def __init__(self, work):
+        super().__init__()
+        self.work = work
+        self.signals = TaskSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def progress(self, done, total):
+        if self._cancel.is_set():
+            raise TaskCancelled()
+        if total > 0:
+            self.signals.progress.emit(min(100, done * 100 // total))
+
+    def run(self):
+        try:
+            result = self.work(self.progress)
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            # Операции в памяти не вызывают progress: их результат просто отбрасывается
+            if self._cancel.is_set():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+
 class MainWindow(QtWidgets.QDialog):
     def __init__(self):
         super(MainWindow, self).__init__()
@@ -98,8 +162,159 @@ class MainWindow(QtWidgets.QDialog):
             QtCore.Qt.WindowCloseButtonHint
         )
 
+        self.thread_pool = QtCore.QThreadPool.globalInstance()
+        # Выполняемая задача и элементы управления для каждой вкладки
+        self.tasks = {}
+        self.task_controls = {}
+
+        self.setup_deflate_settings()
+        self.setup_task_controls()
         self.connect_signals()
 
+    def setup_deflate_settings(self):
+        """Добавляет на вкладки Deflate параметры zlib: уровень, формат, окно, memLevel и стратегию."""
+        label_style = "border-radius:3px;\ncolor: rgb(201, 216, 197);\nfont: 75 9pt \"Inter\";"
+        input_style = "color: rgb(255, 255, 255);\nfont: 75 9pt \"Inter\";"
+
+        def labeled(layout, parent, text, widget):
+            label = QtWidgets.QLabel(text, parent)
+            label.setStyleSheet(label_style)
+            widget.setStyleSheet(input_style)
+            widget.setMinimumSize(QtCore.QSize(60, 30))
+            layout.addWidget(label)
+            layout.addWidget(widget)
+
+        def spin_box(parent, minimum, maximum, value):
+            spin = QtWidgets.QSpinBox(parent)
+            spin.setRange(minimum, maximum)
+            spin.setValue(value)
+            return spin
+
+        # Вкладка сжатия
+        parent = self.ui.DeflateComp
+        settings = QtWidgets.QHBoxLayout()
+        self.ui.DeflateLevel = spin_box(parent, 0, 9, DEFAULT_LEVEL)
+        self.ui.DeflateFraming = QtWidgets.QComboBox(parent)
+        self.ui.DeflateFraming.addItems(FRAMINGS)
+        self.ui.DeflateWindowBits = spin_box(parent, 9, 15, 15)
+        self.ui.DeflateMemLevel = spin_box(parent, 1, 9, 8)
+        self.ui.DeflateStrategy = QtWidgets.QComboBox(parent)
+        self.ui.DeflateStrategy.addItems(STRATEGIES.keys())
+        labeled(settings, parent, "Уровень:", self.ui.DeflateLevel)
+        labeled(settings, parent, "Формат:", self.ui.DeflateFraming)
+        labeled(settings, parent, "Окно (бит):", self.ui.DeflateWindowBits)
+        labeled(settings, parent, "memLevel:", self.ui.DeflateMemLevel)
+        labeled(settings, parent, "Стратегия:", self.ui.DeflateStrategy)
+        self.ui.verticalLayout_10.insertLayout(self.ui.verticalLayout_10.indexOf(self.ui.pushButton_5), settings)
+
+        # Вкладка декомпрессии: zlib и gzip определяются по заголовку, raw нужно указать явно
+        parent = self.ui.DeflateDecomp
+        settings = QtWidgets.QHBoxLayout()
+        self.ui.DeflateDecompFraming = QtWidgets.QComboBox(parent)
+        self.ui.DeflateDecompFraming.addItems(["zlib/gzip (авто)", "raw"])
+        labeled(settings, parent, "Формат:", self.ui.DeflateDecompFraming)
+        self.ui.verticalLayout_5.insertLayout(self.ui.verticalLayout_5.indexOf(self.ui.button_decompress_2), settings)
+
+    def deflate_settings(self):
+        """Параметры zlib, выбранные на вкладке сжатия Deflate."""
+        return {
+            'level': self.ui.DeflateLevel.value(),
+            'wbits': framing_wbits(self.ui.DeflateFraming.currentText(), self.ui.DeflateWindowBits.value()),
+            'mem_level': self.ui.DeflateMemLevel.value(),
+            'strategy': STRATEGIES[self.ui.DeflateStrategy.currentText()],
+        }
+
+    def setup_task_controls(self):
+        """Добавляет под кнопкой запуска каждой вкладки полосу прогресса и кнопку «Отмена»."""
+        ui = self.ui
+        buttons = {
+            'huffman': (ui.verticalLayout_12, ui.ButtonEnter),
+            'huffman_decompress': (ui.gridLayout_5, ui.button_decompress),
+            'lz77': (ui.verticalLayout, ui.pushButton),
+            'lz77_decompress': (ui.verticalLayout_3, ui.pushButton_2),
+            'lz77_file': (ui.verticalLayout_9, ui.ButtonLZ77),
+            'deflate': (ui.verticalLayout_10, ui.pushButton_5),
+            'deflate_decompress': (ui.verticalLayout_5, ui.button_decompress_2),
+            'brotli': (ui.verticalLayout_7, ui.ButtonEnterBrotli),
+            'brotli_decompress': (ui.gridLayout_4, ui.buttonDecompBrotli),
+        }
+        for key, (layout, button) in buttons.items():
+            parent = button.parentWidget()
+            progress_bar = QtWidgets.QProgressBar(parent)
+            progress_bar.setStyleSheet("color: rgb(255, 255, 255);\nfont: 75 9pt \"Inter\";")
+            progress_bar.setValue(0)
+            cancel_button = QtWidgets.QPushButton("Отмена", parent)
+            cancel_button.setStyleSheet(button.styleSheet())
+            cancel_button.setEnabled(False)
+            cancel_button.clicked.connect(lambda checked, key=key: self.cancel_task(key))
+
+            row = QtWidgets.QHBoxLayout()
+            row.addWidget(progress_bar)
+            row.addWidget(cancel_button)
+            if isinstance(layout, QtWidgets.QGridLayout):
+                _, column, _, column_span = layout.getItemPosition(layout.indexOf(button))
+                layout.addLayout(row, layout.rowCount(), column, 1, column_span)
+            else:
+                layout.insertLayout(layout.indexOf(button) + 1, row)
+            self.task_controls[key] = (button, progress_bar, cancel_button)
+
+    def start_task(self, key, work, on_finished, error_title, output_file=None):
+        """
+        Запускает work(progress) в пуле потоков; on_finished(result) вызывается в потоке интерфейса.
+        При ошибке или отмене недописанный output_file удаляется.
+        """
+        if key in self.tasks:
+            return
+        button, progress_bar, cancel_button = self.task_controls[key]
+        task = CodecTask(work)
+        self.tasks[key] = task
+
+        button.setEnabled(False)
+        cancel_button.setEnabled(True)
+        # Пока работа не сообщила о прогрессе, полоса показывает неопределённое ожидание
+        progress_bar.setRange(0, 0)
+
+        def progress(percent):
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(percent)
+
+        def finished(result):
+            self.finish_task(key)
+            progress_bar.setValue(100)
+            on_finished(result)
+
+        def failed(message):
+            self.finish_task(key, output_file)
+            self.show_error_message("Ошибка", f"{error_title}: {message}", QMessageBox.Critical)
+
+        task.signals.progress.connect(progress)
+        task.signals.finished.connect(finished)
+        task.signals.failed.connect(failed)
+        task.signals.cancelled.connect(lambda: self.finish_task(key, output_file))
+        self.thread_pool.start(task)
+
+    def cancel_task(self, key):
+        task = self.tasks.get(key)
+        if task is not None:
+            task.cancel()
+            self.task_controls[key][2].setEnabled(False)
+
+    def finish_task(self, key, remove_file=None):
+        self.tasks.pop(key, None)
+        button, progress_bar, cancel_button = self.task_controls[key]
+        button.setEnabled(True)
+        cancel_button.setEnabled(False)
+        progress_bar.setRange(0, 100)
+        progress_bar.setValue(0)
+        if remove_file and os.path.exists(remove_file):
+            os.remove(remove_file)
+
+    def closeEvent(self, event):
+        for task in self.tasks.values():
+            task.cancel()
+        self.thread_pool.waitForDone()
+        super().closeEvent(event)
+
     def connect_signals(self):
         self.ui.chooseFile.clicked.connect(self.select_file_for_huffman)
         self.ui.ButtonEnter.clicked.connect(self.compress_with_huffman)
@@ -145,6 +360,12 @@ class MainWindow(QtWidgets.QDialog):
         msg.setIcon(icon)
         msg.exec_()
 
+    def decompress_file(self, codec, input_file, output_file, progress=None):
+        """Разжимает файл: контейнер описывает себя сам, иначе — формат codec."""
+        if is_container(input_file):
+            return unpack_file(input_file, output_file, progress)
+        return codec.decompress_file(input_file, output_file, progress=progress)
+
     # ========== ZIP функционал ==========
     def select_files_for_zip(self):
         files, _ = QFileDialog.getOpenFileNames(self, "Выберите файлы для архивации", "", "Все файлы (*)")
@@ -209,45 +430,41 @@ class MainWindow(QtWidgets.QDialog):
         if not output_file:
             return
 
-        try:
-            start_time = time.time()  # Начало замера времени
-
-            if hasattr(self, 'selected_file_for_huffman') and self.selected_file_for_huffman:
-                # Сжатие файла
-                original_size = os.path.getsize(self.selected_file_for_huffman)  # Размер исходного файла
-                huffman_compress(self.selected_file_for_huffman, output_file)
-                compressed_size = os.path.getsize(output_file)  # Размер сжатого файла
-                self.ui.status.setText(f"Файл сжат: {os.path.basename(output_file)}")
-            else:
-                text = self.ui.origHuffmanText.toPlainText()
-                if not text:
-                    self.show_error_message("Ошибка", "Введите текст или выберите файл для сжатия!",
-                                            QMessageBox.Warning)
-                    return
-
-                temp_input_file = "temp_huffman_input.txt"
-                with open(temp_input_file, 'w', encoding='utf-8') as f:
-                    f.write(text)
-
-                original_size = os.path.getsize(temp_input_file)  # Размер исходного текста
-                huffman_compress(temp_input_file, output_file)
-                compressed_size = os.path.getsize(output_file)  # Размер сжатого файла
-                os.remove(temp_input_file)
-                self.ui.status.setText(f"Текст сжат: {os.path.basename(output_file)}")
-
-            # Вычисление статистики
-            end_time = time.time()
-            compression_time = (end_time - start_time) * 1000  # Время в миллисекундах
-            compression_ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
+        # Байтовый режим: файл сжимается как есть, без перекодирования из UTF-8 и обратно,
+        # и годится любое содержимое; режим записан в заголовке контейнера
+        codec = get_codec('huffman', mode='bytes')
 
+        if hasattr(self, 'selected_file_for_huffman') and self.selected_file_for_huffman:
+            # Сжатие файла
+            input_file = self.selected_file_for_huffman
+            message = f"Файл сжат: {os.path.basename(output_file)}"
+
+            def work(progress):
+                return pack_file(input_file, output_file, codec, GUI_BLOCK_SIZE, progress=progress,
+                                 workers=pack_workers(input_file))
+        else:
+            text = self.ui.origHuffmanText.toPlainText()
+            if not text:
+                self.show_error_message("Ошибка", "Введите текст или выберите файл для сжатия!",
+                                        QMessageBox.Warning)
+                return
+            message = f"Текст сжат: {os.path.basename(output_file)}"
+
+            def work(progress):
+                result = pack_bytes(text.encode('utf-8'), codec, GUI_BLOCK_SIZE)
+                with open(output_file, 'wb') as f:
+                    f.write(result['compressed_bytes'])
+                return result
+
+        def finished(result):
+            self.ui.status.setText(message)
             # Обновление интерфейса
-            self.ui.compTimeHuf.setPlainText(f"{compression_time:.2f} мс")
-            self.ui.OrigSizeHuf.setPlainText(f"{original_size} байт")
-            self.ui.CompSizeHuf.setPlainText(f"{compressed_size} байт")
-            self.ui.CompPercHuf.setPlainText(f"{compression_ratio:.2f}%")
+            self.ui.compTimeHuf.setPlainText(f"{result['compression_time']:.2f} мс")
+            self.ui.OrigSizeHuf.setPlainText(f"{result['original_size']} байт")
+            self.ui.CompSizeHuf.setPlainText(f"{result['compressed_size']} байт")
+            self.ui.CompPercHuf.setPlainText(f"{result['compression_ratio']:.2f}%")
 
-        except Exception as e:
-            self.show_error_message("Ошибка", f"Ошибка при сжатии: {str(e)}", QMessageBox.Critical)
+        self.start_task('huffman', work, finished, "Ошибка при сжатии", output_file)
 
     def select_file_for_huffman_decompress(self):
         file, _ = QFileDialog.getOpenFileName(self, "Выберите файл для разжатия", "", "Huffman Compressed (*.huff)")
@@ -265,11 +482,16 @@ class MainWindow(QtWidgets.QDialog):
 
         output_file, _ = QFileDialog.getSaveFileName(self, "Сохранить разжатый файл", "", "Текстовые файлы (*.txt)")
         if output_file:
-            try:
-                huffman_decompress(self.selected_file_for_huffman_decompress, output_file)
+            input_file = self.selected_file_for_huffman_decompress
+
+            def work(progress):
+                # Старые .huff без контейнера — один блок текстового режима
+                return self.decompress_file(get_codec('huffman', mode='text'), input_file, output_file, progress)
+
+            def finished(result):
                 self.ui.status_4.setText(f"Успешная декомпрессия: {os.path.basename(output_file)}")
-            except Exception as e:
-                self.show_error_message("Ошибка", f"Ошибка при разжатии: {str(e)}", QMessageBox.Critical)
+
+            self.start_task('huffman_decompress', work, finished, "Ошибка при разжатии", output_file)
 
     # ========== LZ77 функционал ==========
     def compress_with_lz77(self):
@@ -281,18 +503,20 @@ class MainWindow(QtWidgets.QDialog):
         window_size = self.ui.WindowSize.value()
         buffer_size = self.ui.BufferSize.value()
 
-        try:
-            result = lz77_compress(text, window_size, buffer_size)
+        def work(progress):
+            return lz77_compress(text, window_size, buffer_size, with_tokens=True)
 
-            self.ui.compressedResult.setPlainText(result['encoded_sequence'])
+        def finished(result):
+            # В поле выводится двоичный поток троек в base64: он в разы короче
+            # читаемой записи '(offset,length,symbol)' и разбирается без регулярных выражений
+            self.ui.compressedResult.setPlainText(base64.b64encode(result['token_bytes']).decode('ascii'))
 
             self.ui.CompressionTime.setPlainText(f"{result['compression_time']:.2f} мс")
             self.ui.originalTextSize.setPlainText(f"{result['original_size']} байт")
             self.ui.compressedTextSize.setPlainText(f"{result['compressed_size']} байт")
             self.ui.CompressionPercentage.setPlainText(f"{result['compression_ratio']:.2f}%")
 
-        except Exception as e:
-            self.show_error_message("Ошибка", f"Ошибка при сжатии LZ77: {str(e)}", QMessageBox.Critical)
+        self.start_task('lz77', work, finished, "Ошибка при сжатии LZ77")
 
     def decompress_with_lz77(self):
         encoded_sequence = self.ui.compressedText.toPlainText().strip()
@@ -303,17 +527,24 @@ class MainWindow(QtWidgets.QDialog):
         window_size = self.ui.WindowSize.value()
         buffer_size = self.ui.BufferSize.value()
 
-        try:
-            result = lz77_decompress_from_sequence(encoded_sequence, window_size, buffer_size)
+        def work(progress):
+            # Читаемая запись троек по-прежнему принимается — для отладки
+            if encoded_sequence.startswith('('):
+                return lz77_decompress_from_sequence(encoded_sequence, window_size, buffer_size)
+            try:
+                token_bytes = base64.b64decode(''.join(encoded_sequence.split()), validate=True)
+            except binascii.Error:
+                raise ValueError("Ожидается base64 двоичного потока троек или последовательность '(offset,length,symbol)'")
+            return lz77_decompress_tokens(token_bytes)
 
+        def finished(result):
             self.ui.decompressedText.setPlainText(result['decompressed_text'])
 
             self.ui.decompressionTimeStat.setPlainText(f"{result['decompression_time']:.2f} мс")
             self.ui.CompressedSizeStat.setPlainText(f"{result['compressed_size']} байт")
             self.ui.DecompressedSizeStat.setPlainText(f"{result['decompressed_size']} байт")
 
-        except Exception as e:
-            self.show_error_message("Ошибка", f"Ошибка при декомпрессии LZ77: {str(e)}", QMessageBox.Critical)
+        self.start_task('lz77_decompress', work, finished, "Ошибка при декомпрессии LZ77")
 
     def select_file_for_lz77(self):
         file, _ = QFileDialog.getOpenFileName(self, "Выберите файл для сжатия", "", "Текстовые файлы (*.txt)")
@@ -334,18 +565,16 @@ class MainWindow(QtWidgets.QDialog):
         if not output_file:
             return
 
-        try:
-            with open(self.selected_file_for_lz77, 'r', encoding='utf-8') as f:
-                text = f.read()
-
-            window_size = self.ui.WindowSize_File.value()
-            buffer_size = self.ui.BufferSize_File.value()
+        input_file = self.selected_file_for_lz77
+        codec = get_codec('lz77', window_size=self.ui.WindowSize_File.value(),
+                          buffer_size=self.ui.BufferSize_File.value())
 
-            result = lz77_compress(text, window_size, buffer_size)
-
-            with open(output_file, 'wb') as f:
-                f.write(result['compressed_bytes'])
+        def work(progress):
+            # Контейнер хранит размеры окна и буфера, без них файл не разжать
+            return pack_file(input_file, output_file, codec, GUI_BLOCK_SIZE, progress=progress,
+                             workers=pack_workers(input_file))
 
+        def finished(result):
             self.ui.CompressionTime_File.setPlainText(f"{result['compression_time']:.2f} мс")
             self.ui.originalTextSize_File.setPlainText(f"{result['original_size']} байт")
             self.ui.compressedTextSize_File.setPlainText(f"{result['compressed_size']} байт")
@@ -353,8 +582,7 @@ class MainWindow(QtWidgets.QDialog):
 
             self.ui.status_2.setText(f"Файл сжат: {os.path.basename(output_file)}")
 
-        except Exception as e:
-            self.show_error_message("Ошибка", f"Ошибка при сжатии LZ77: {str(e)}", QMessageBox.Critical)
+        self.start_task('lz77_file', work, finished, "Ошибка при сжатии LZ77", output_file)
 
     # ========== Deflate функционал ==========
     def select_file_for_deflate(self):
@@ -373,28 +601,37 @@ class MainWindow(QtWidgets.QDialog):
             return
 
         try:
-            if hasattr(self, 'selected_file_for_deflate') and self.selected_file_for_deflate:
-                with open(self.selected_file_for_deflate, 'r', encoding='utf-8') as f:
-                    text = f.read()
-            else:
-                text = self.ui.OriginalText_3.toPlainText()
-                if not text:
-                    self.show_error_message("Ошибка", "Введите текст или выберите файл для сжатия!",
-                                            QMessageBox.Warning)
-                    return
-
-            result = deflate_compress(text)
+            codec = get_codec('deflate', **self.deflate_settings())
+        except Exception as e:
+            self.show_error_message("Ошибка", f"Ошибка при сжатии Deflate: {str(e)}", QMessageBox.Critical)
+            return
 
-            with open(output_file, 'wb') as f:
-                f.write(result['compressed_bytes'])
+        if hasattr(self, 'selected_file_for_deflate') and self.selected_file_for_deflate:
+            input_file = self.selected_file_for_deflate
 
+            def work(progress):
+                # Файл сжимается потоком как есть, без декодирования в текст
+                return codec.compress_file(input_file, output_file, progress=progress)
+        else:
+            text = self.ui.OriginalText_3.toPlainText()
+            if not text:
+                self.show_error_message("Ошибка", "Введите текст или выберите файл для сжатия!",
+                                        QMessageBox.Warning)
+                return
+
+            def work(progress):
+                result = codec.compress_text(text)
+                with open(output_file, 'wb') as f:
+                    f.write(result['compressed_bytes'])
+                return result
+
+        def finished(result):
             self.ui.compTime.setPlainText(f"{result['compression_time']:.2f} мс")
             self.ui.OrigSize.setPlainText(f"{result['original_size']} байт")
             self.ui.CompSize.setPlainText(f"{result['compressed_size']} байт")
             self.ui.CompPerc.setPlainText(f"{result['compression_ratio']:.2f}%")
 
-        except Exception as e:
-            self.show_error_message("Ошибка", f"Ошибка при сжатии Deflate: {str(e)}", QMessageBox.Critical)
+        self.start_task('deflate', work, finished, "Ошибка при сжатии Deflate", output_file)
 
     def select_file_for_deflate_decompress(self):
         file, _ = QFileDialog.getOpenFileName(self, "Выберите файл для разжатия", "", "Deflate Compressed (*.deflate)")
@@ -412,17 +649,19 @@ class MainWindow(QtWidgets.QDialog):
 
         output_file, _ = QFileDialog.getSaveFileName(self, "Сохранить разжатый файл", "", "Текстовые файлы (*.txt)")
         if output_file:
-            try:
-                with open(self.selected_file_for_deflate_decompress, 'rb') as f:
-                    compressed_bytes = f.read()
-                result = deflate_decompress(compressed_bytes)
+            input_file = self.selected_file_for_deflate_decompress
+            if self.ui.DeflateDecompFraming.currentText() == "raw":
+                codec = get_codec('deflate', wbits=framing_wbits('raw'))
+            else:
+                codec = get_codec('deflate')
 
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(result['decompressed_text'])
+            def work(progress):
+                return self.decompress_file(codec, input_file, output_file, progress)
 
+            def finished(result):
                 self.ui.status_5.setText(f"Успешная декомпрессия: {os.path.basename(output_file)}")
-            except Exception as e:
-                self.show_error_message("Ошибка", f"Ошибка при разжатии Deflate: {str(e)}", QMessageBox.Critical)
+
+            self.start_task('deflate_decompress', work, finished, "Ошибка при разжатии Deflate", output_file)
 
     # ========== Brotli функционал ==========
     def select_file_for_brotli(self):
@@ -440,32 +679,39 @@ class MainWindow(QtWidgets.QDialog):
         if not output_file:
             return
 
-        try:
-            if hasattr(self, 'selected_file_for_brotli') and self.selected_file_for_brotli:
-                # Compress file
-                result = brotli_compress(self.selected_file_for_brotli)
-                self.ui.status_2.setText(f"Файл сжат: {os.path.basename(output_file)}")
-            else:
-                text = self.ui.origTextBrotli.toPlainText()
-                if not text:
-                    self.show_error_message("Ошибка", "Введите текст или выберите файл для сжатия!",
-                                            QMessageBox.Warning)
-                    return
-                # Compress text
-                result = brotli_compress(text)
-
-            # Save compressed data
-            with open(output_file, 'wb') as f:
-                f.write(result['compressed_bytes'])
+        codec = get_codec('brotli')
+        if hasattr(self, 'selected_file_for_brotli') and self.selected_file_for_brotli:
+            input_file = self.selected_file_for_brotli
+            message = f"Файл сжат: {os.path.basename(output_file)}"
 
+            def work(progress):
+                # Compress file, streaming it to the output
+                return codec.compress_file(input_file, output_file, progress=progress)
+        else:
+            text = self.ui.origTextBrotli.toPlainText()
+            if not text:
+                self.show_error_message("Ошибка", "Введите текст или выберите файл для сжатия!",
+                                        QMessageBox.Warning)
+                return
+            message = None
+
+            def work(progress):
+                # Compress text and save compressed data
+                result = codec.compress_text(text)
+                with open(output_file, 'wb') as f:
+                    f.write(result['compressed_bytes'])
+                return result
+
+        def finished(result):
+            if message:
+                self.ui.status_2.setText(message)
             # Update UI with statistics
             self.ui.compTimeBrotli.setPlainText(f"{result['compression_time']:.2f} мс")
             self.ui.OrigSizeBrotli.setPlainText(f"{result['original_size']} байт")
             self.ui.CompSizeBrotli.setPlainText(f"{result['compressed_size']} байт")
             self.ui.CompPercBrotli.setPlainText(f"{result['compression_ratio']:.2f}%")
 
-        except Exception as e:
-            self.show_error_message("Ошибка", f"Ошибка при сжатии Brotli: {str(e)}", QMessageBox.Critical)
+        self.start_task('brotli', work, finished, "Ошибка при сжатии Brotli", output_file)
 
     def select_file_for_brotli_decompress(self):
         file, _ = QFileDialog.getOpenFileName(self, "Выберите файл для разжатия", "", "Brotli Compressed (*.br)")
@@ -483,14 +729,15 @@ class MainWindow(QtWidgets.QDialog):
 
         output_file, _ = QFileDialog.getSaveFileName(self, "Сохранить разжатый файл", "", "Текстовые файлы (*.txt)")
         if output_file:
-            try:
-                result = brotli_decompress(self.selected_file_for_brotli_decompress)
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(result['decompressed_text'])
+            input_file = self.selected_file_for_brotli_decompress
+
+            def work(progress):
+                return self.decompress_file(get_codec('brotli'), input_file, output_file, progress)
+
+            def finished(result):
                 self.ui.statusBrotli.setText(f"Успешная декомпрессия: {os.path.basename(output_file)}")
-            except Exception as e:
-                self.show_error_message("Ошибка", f"Ошибка при разжатии Brotli: {str(e)}", QMessageBox.Critical)
 
+            self.start_task('brotli_decompress', work, finished, "Ошибка при разжатии Brotli", output_file)
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
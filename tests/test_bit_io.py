@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from bit_io import BitReader, BitWriter
+
+
+def _reference(fields):
+    value = 0
+    count = 0
+    for field, width in fields:
+        value = (value << width) | field
+        count += width
+    padding = -count % 8
+    return (value << padding).to_bytes((count + padding) // 8, 'big')
+
+
+@pytest.mark.parametrize('widths', [
+    [63, 1, 1],          # the flush threshold is reached exactly, then crossed
+    [64, 64],
+    [1] * 130,
+    [7, 60, 3, 64, 13],
+    [200, 5],            # a single field wider than the accumulator threshold
+])
+def test_writer_matches_reference(widths):
+    rng = random.Random(len(widths))
+    fields = [(rng.getrandbits(width), width) for width in widths]
+    writer = BitWriter()
+    for field, width in fields:
+        writer.write(field, width)
+    assert writer.bit_length() == sum(widths)
+    assert bytes(writer.getvalue()) == _reference(fields)
+
+
+def test_reader_round_trip_across_refills():
+    rng = random.Random(1)
+    fields = [(rng.getrandbits(width), width) for width in (rng.randint(1, 70) for _ in range(500))]
+    data = _reference(fields)
+    reader = BitReader(memoryview(data))
+    assert [reader.read(width) for _, width in fields] == [field for field, _ in fields]
+    assert reader.bits_left() < 8
+
+
+def test_reader_eof():
+    reader = BitReader(b'\xA5')
+    assert reader.read(3) == 0b101
+    assert reader.bits_left() == 5
+    with pytest.raises(EOFError):
+        reader.read(6)
+
+
+def test_skip_past_end():
+    reader = BitReader(b'\xff\xff')
+    reader.skip(10)
+    with pytest.raises(EOFError):
+        reader.skip(7)
+
+
+def test_peek_pads_with_zeros():
+    reader = BitReader(b'\xC0')
+    assert reader.peek(12) == 0b110000000000
+    assert reader.read(2) == 0b11
+
+
+def test_empty():
+    assert bytes(BitWriter().getvalue()) == b''
+    assert BitReader(b'').bits_left() == 0
+    with pytest.raises(EOFError):
+        BitReader(b'').read(1)
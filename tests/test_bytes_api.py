@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import BrotliComp
+import deflate
+import huffman_coding
+import lz77
+
+rng = random.Random(7)
+INPUTS = {
+    'empty': b'',
+    'one byte': b'x',
+    'text': "Съешь же ещё этих мягких французских булок, да выпей чаю. The quick brown fox.\n".encode() * 200,
+    'random': rng.randbytes(5000),
+    'run': b'\x00' * 10000,
+}
+
+
+def _deflate(data):
+    compressed = deflate.deflate_compress_bytes(data)['compressed_bytes']
+    return deflate.deflate_decompress_bytes(compressed)['decompressed_bytes']
+
+
+def _brotli(data):
+    compressed = BrotliComp.brotli_compress_bytes(data)['compressed_bytes']
+    return BrotliComp.brotli_decompress_bytes(compressed)['decompressed_bytes']
+
+
+def _huffman(data):
+    return huffman_coding.decompress_bytes(huffman_coding.compress_bytes(data))
+
+
+def _lz77(data):
+    compressed = lz77.lz77_compress_bytes(data, 4095, 255)['compressed_bytes']
+    return lz77.lz77_decompress_bytes(compressed, 4095, 255)['decompressed_bytes']
+
+
+ROUND_TRIPS = {'deflate': _deflate, 'brotli': _brotli, 'huffman': _huffman, 'lz77': _lz77}
+
+
+@pytest.mark.parametrize('codec', ROUND_TRIPS)
+@pytest.mark.parametrize('name', INPUTS)
+@pytest.mark.parametrize('wrap', [bytes, bytearray, memoryview])
+def test_round_trip(codec, name, wrap):
+    data = INPUTS[name]
+    assert bytes(ROUND_TRIPS[codec](wrap(data))) == data
+
+
+def test_text_wrappers():
+    text = "привет, мир 😀 " * 50
+    assert deflate.deflate_decompress(deflate.deflate_compress(text)['compressed_bytes'])['decompressed_text'] == text
+    compressed = lz77.lz77_compress(text, 4095, 255)['compressed_bytes']
+    assert lz77.lz77_decompress(compressed, 4095, 255)['decompressed_text'] == text
+
+
+def test_stats():
+    data = INPUTS['text']
+    result = deflate.deflate_compress_bytes(data)
+    assert result['original_size'] == len(data)
+    assert result['compressed_size'] == len(result['compressed_bytes'])
+    result = lz77.lz77_compress_bytes(data, 4095, 255)
+    assert result['compressed_size'] == len(result['compressed_bytes'])
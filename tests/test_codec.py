@@ -0,0 +1,81 @@
+import pytest
+
+from codec import Codec, available_codecs, get_codec, parse_params
+
+DATA = "Хаффман, LZ77, DEFLATE и Brotli — one interface for all of them.\n".encode() * 500
+
+CODECS = [
+    ('huffman', {}),
+    ('huffman', {'mode': 'text'}),
+    ('lz77', {}),
+    ('lz77', {'level': 1}),
+    ('lz77', {'level': 5}),
+    ('deflate', {}),
+    ('deflate', {'workers': 2}),
+    ('brotli', {}),
+]
+
+
+def test_registry():
+    assert set(available_codecs()) == {'huffman', 'lz77', 'deflate', 'brotli'}
+    with pytest.raises(ValueError):
+        get_codec('nope')
+
+
+@pytest.mark.parametrize('name, params', CODECS)
+def test_round_trip(name, params):
+    codec = get_codec(name, **params)
+    assert bytes(codec.decompress(codec.compress(DATA))) == DATA
+    assert bytes(codec.decompress(codec.compress(b''))) == b''
+
+
+@pytest.mark.parametrize('name, params', CODECS)
+def test_stream_round_trip(name, params):
+    codec = get_codec(name, **params)
+    chunks = [DATA[i:i + 4096] for i in range(0, len(DATA), 4096)]
+    compressed = b''.join(codec.compress_stream(iter(chunks)))
+    assert b''.join(codec.decompress_stream(iter([compressed[:100], compressed[100:]]))) == DATA
+
+
+@pytest.mark.parametrize('name, params', CODECS)
+def test_file_round_trip(name, params, tmp_path):
+    codec = get_codec(name, **params)
+    source = tmp_path / 'input.txt'
+    source.write_bytes(DATA)
+    calls = []
+    result = codec.compress_file(source, tmp_path / 'packed', chunk_size=8192,
+                                 progress=lambda done, total: calls.append((done, total)))
+    assert result['original_size'] == len(DATA)
+    assert calls[-1] == (len(DATA), len(DATA))
+    codec.decompress_file(tmp_path / 'packed', tmp_path / 'output.txt')
+    assert (tmp_path / 'output.txt').read_bytes() == DATA
+
+
+def test_text_helpers():
+    codec = get_codec('deflate')
+    text = "текст " * 100
+    assert codec.decompress_text(codec.compress_text(text)['compressed_bytes'])['decompressed_text'] == text
+
+
+def test_params_rebuild_the_codec():
+    codec = get_codec('lz77', window_size=1023, buffer_size=63)
+    clone = get_codec(codec.name, **codec.params())
+    assert clone.decompress(codec.compress(DATA)) == DATA
+
+
+def test_incomplete_codec_cannot_be_created():
+    class HalfCodec(Codec):
+        name = 'half'
+
+        def compress(self, data):
+            return data
+
+    with pytest.raises(TypeError):
+        HalfCodec()
+
+
+def test_parse_params():
+    assert parse_params(['level=6', 'mode=text', 'dictionary_id=None']) == {
+        'level': 6, 'mode': 'text', 'dictionary_id': None}
+    with pytest.raises(ValueError):
+        parse_params(['level'])
@@ -0,0 +1,125 @@
+import io
+import random
+
+import pytest
+
+from codec import get_codec
+from dictionaries import register_dictionary
+from container import (_FRAME, ContainerReader, ContainerWriter, is_container, iter_container, pack_bytes,
+                       pack_file, read_range, unpack_file)
+
+rng = random.Random(11)
+DATA = b''.join(f"line {i}: {rng.random()}\n".encode() for i in range(20000))
+BLOCK_SIZE = 16 * 1024
+
+
+def _unpack(container):
+    return b''.join(iter_container(io.BytesIO(container)))
+
+
+@pytest.mark.parametrize('name, params', [
+    ('deflate', {}), ('brotli', {}), ('lz77', {}), ('huffman', {}), ('huffman', {'mode': 'text'}),
+])
+def test_round_trip(name, params):
+    container = pack_bytes(DATA, get_codec(name, **params), BLOCK_SIZE)['compressed_bytes']
+    assert _unpack(container) == DATA
+
+
+def test_empty_input():
+    container = pack_bytes(b'', get_codec('deflate'))['compressed_bytes']
+    assert _unpack(container) == b''
+    assert ContainerReader(io.BytesIO(container)).read() == b''
+
+
+def test_file_round_trip(tmp_path):
+    source = tmp_path / 'data.txt'
+    source.write_bytes(DATA)
+    pack_file(source, tmp_path / 'data.cac', get_codec('deflate', level=1), BLOCK_SIZE, chunk_size=5000)
+    assert is_container(tmp_path / 'data.cac')
+    assert not is_container(source)
+    unpack_file(tmp_path / 'data.cac', tmp_path / 'out.txt')
+    assert (tmp_path / 'out.txt').read_bytes() == DATA
+
+
+def test_parallel_output_matches_sequential():
+    codec = get_codec('deflate')
+    sequential = pack_bytes(DATA, codec, BLOCK_SIZE)['compressed_bytes']
+    parallel = pack_bytes(DATA, codec, BLOCK_SIZE, workers=2)['compressed_bytes']
+    assert parallel == sequential
+
+
+@pytest.mark.parametrize('wbits', [15, -15])
+def test_parallel_with_dictionary(wbits):
+    # Spawned workers do not inherit the registry: the dictionary must be passed on to them
+    codec = get_codec('deflate', wbits=wbits, dictionary_id=register_dictionary(DATA[:4096]))
+    sequential = pack_bytes(DATA, codec, BLOCK_SIZE)['compressed_bytes']
+    parallel = pack_bytes(DATA, codec, BLOCK_SIZE, workers=2)['compressed_bytes']
+    assert parallel == sequential
+    assert _unpack(parallel) == DATA
+
+
+def test_random_access():
+    container = pack_bytes(DATA, get_codec('deflate'), BLOCK_SIZE)['compressed_bytes']
+    reader = ContainerReader(io.BytesIO(container))
+    assert len(reader) == -(-len(DATA) // BLOCK_SIZE)
+    assert reader.original_size == len(DATA)
+    ranges = [(0, 10), (BLOCK_SIZE - 3, 6), (BLOCK_SIZE, BLOCK_SIZE), (5, 3 * BLOCK_SIZE),
+              (len(DATA) - 5, 100), (len(DATA), 10), (len(DATA) + 10, 10), (123, 0)]
+    ranges += [(rng.randrange(len(DATA)), rng.randrange(2 * BLOCK_SIZE)) for _ in range(20)]
+    for offset, size in ranges:
+        assert reader.read(offset, size) == DATA[offset:offset + size]
+    assert reader.read() == DATA
+
+
+def test_read_range(tmp_path):
+    path = tmp_path / 'data.cac'
+    path.write_bytes(pack_bytes(DATA, get_codec('lz77'), BLOCK_SIZE)['compressed_bytes'])
+    assert read_range(path, 40000, 500) == DATA[40000:40500]
+
+
+def test_read_rejects_negative_arguments():
+    reader = ContainerReader(io.BytesIO(pack_bytes(DATA, get_codec('deflate'), BLOCK_SIZE)['compressed_bytes']))
+    with pytest.raises(ValueError):
+        reader.read(-5, 10)
+    with pytest.raises(ValueError):
+        reader.read(0, -1)
+
+
+@pytest.mark.parametrize('block_size', [0, -1, 1 << 32])
+def test_block_size_is_validated(block_size):
+    with pytest.raises(ValueError):
+        ContainerWriter(io.BytesIO(), get_codec('deflate'), block_size)
+
+
+def _stored_container():
+    # Raw stored DEFLATE has no checksum of its own, so only the container CRC can notice damage
+    codec = get_codec('deflate', level=0, wbits=-15)
+    return bytearray(pack_bytes(DATA, codec, BLOCK_SIZE)['compressed_bytes'])
+
+
+def test_payload_corruption_is_detected():
+    container = _stored_container()
+    frame_offset = ContainerReader(io.BytesIO(bytes(container))).frame_offsets[1]
+    container[frame_offset + _FRAME.size + 100] ^= 0x01
+    with pytest.raises(ValueError, match="checksum"):
+        _unpack(bytes(container))
+    reader = ContainerReader(io.BytesIO(bytes(container)))
+    assert reader.read(0, 100) == DATA[:100]  # other blocks stay readable
+    with pytest.raises(ValueError, match="checksum"):
+        reader.read_block(1)
+
+
+def test_crc_field_corruption_is_detected():
+    container = _stored_container()
+    frame_offset = ContainerReader(io.BytesIO(bytes(container))).frame_offsets[0]
+    container[frame_offset + _FRAME.size - 1] ^= 0xFF
+    with pytest.raises(ValueError, match="checksum"):
+        _unpack(bytes(container))
+
+
+def test_truncated_container():
+    container = pack_bytes(DATA, get_codec('deflate'), BLOCK_SIZE)['compressed_bytes']
+    with pytest.raises(ValueError):
+        _unpack(container[:len(container) // 2])
+    with pytest.raises(ValueError):
+        ContainerReader(io.BytesIO(container[:-3]))
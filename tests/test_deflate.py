@@ -0,0 +1,62 @@
+import gzip
+import random
+import zlib
+
+import pytest
+
+from deflate import deflate_compress_bytes, deflate_compress_parallel_stream, deflate_decompress_bytes, framing_wbits
+from dictionaries import register_dictionary
+
+DICTIONARY = b'{"user": "", "status": "active", "created_at": "2024-01-01T00:00:00Z", "tags": []}' * 4
+RECORD = b'{"user": "alice", "status": "active", "created_at": "2024-05-17T09:12:44Z", "tags": ["x"]}'
+DATA = RECORD * 3000
+
+
+@pytest.fixture(scope='module')
+def dictionary_id():
+    return register_dictionary(DICTIONARY)
+
+
+@pytest.mark.parametrize('framing', ['zlib', 'raw', 'gzip'])
+@pytest.mark.parametrize('use_dictionary', [False, True])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_round_trip(framing, use_dictionary, workers, dictionary_id):
+    wbits = framing_wbits(framing)
+    dict_id = dictionary_id if use_dictionary else None
+    if framing == 'gzip' and use_dictionary:
+        with pytest.raises(ValueError, match="gzip"):
+            deflate_compress_bytes(DATA, wbits=wbits, workers=workers, dictionary_id=dict_id)
+        return
+
+    compressed = deflate_compress_bytes(DATA, wbits=wbits, workers=workers, dictionary_id=dict_id)['compressed_bytes']
+    # zlib and gzip are detected from the header; raw streams need explicit wbits and dictionary
+    if framing == 'raw':
+        result = deflate_decompress_bytes(compressed, wbits=wbits, dictionary_id=dict_id)
+    else:
+        result = deflate_decompress_bytes(compressed)
+    assert result['decompressed_bytes'] == DATA
+
+
+def test_dictionary_helps_small_records(dictionary_id):
+    plain = deflate_compress_bytes(RECORD)['compressed_size']
+    primed = deflate_compress_bytes(RECORD, dictionary_id=dictionary_id)['compressed_size']
+    assert primed < plain
+
+
+@pytest.mark.parametrize('framing', ['zlib', 'raw', 'gzip'])
+def test_parallel_stream_is_standard(framing):
+    rng = random.Random(3)
+    # Mixed compressible and random data, fed in uneven chunks across many small blocks
+    data = b''.join(RECORD * rng.randint(1, 20) + rng.randbytes(rng.randint(0, 500)) for _ in range(200))
+    chunks = [data[i:i + 7001] for i in range(0, len(data), 7001)]
+    wbits = framing_wbits(framing)
+    compressed = b''.join(deflate_compress_parallel_stream(chunks, wbits=wbits, block_size=16 * 1024, workers=3))
+
+    if framing == 'gzip':
+        assert gzip.decompress(compressed) == data
+    else:
+        assert zlib.decompress(compressed, wbits) == data
+
+
+def test_parallel_stream_empty_input():
+    assert zlib.decompress(b''.join(deflate_compress_parallel_stream([], workers=2))) == b''
@@ -0,0 +1,77 @@
+import json
+import random
+import zlib
+
+import pytest
+
+import BrotliComp
+from BrotliComp import brotli_compress_bytes, brotli_decompress_bytes
+from codec import get_codec
+from deflate import deflate_compress_bytes, deflate_decompress_bytes
+from dictionaries import dictionary_id, get_dictionary, read_samples, register_dictionary, train_dictionary
+
+rng = random.Random(3)
+
+
+def _record(index):
+    return json.dumps({
+        "id": index,
+        "user": {"name": rng.choice(["alice", "bob", "carol", "dave"]), "active": rng.random() < 0.5},
+        "event": rng.choice(["login", "logout", "purchase", "page_view"]),
+        "timestamp": f"2024-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z",
+        "tags": rng.sample(["mobile", "desktop", "beta", "eu", "us", "trial"], 2),
+    }).encode('utf-8')
+
+
+SAMPLES = [_record(i) for i in range(500)]
+RECORD = _record(1000)
+
+
+@pytest.fixture(scope='module')
+def dict_id():
+    return register_dictionary(train_dictionary(SAMPLES, size=4096))
+
+
+def test_trained_dictionary(dict_id):
+    dictionary = get_dictionary(dict_id)
+    assert 0 < len(dictionary) <= 4096
+    assert dictionary_id(dictionary) == dict_id == zlib.adler32(dictionary)
+    # Substrings shared by the records end up in the dictionary
+    assert b'"timestamp": "2024-01-' in dictionary
+
+
+@pytest.mark.parametrize('wbits', [15, -15])
+def test_dictionary_shrinks_a_record_under_deflate(dict_id, wbits):
+    plain = deflate_compress_bytes(RECORD, wbits=wbits)['compressed_bytes']
+    primed = deflate_compress_bytes(RECORD, wbits=wbits, dictionary_id=dict_id)['compressed_bytes']
+    assert len(primed) < len(plain) * 0.7
+    # zlib streams name their dictionary in the header, raw streams need the ID
+    decompress_id = None if wbits > 0 else dict_id
+    assert deflate_decompress_bytes(primed, wbits, decompress_id)['decompressed_bytes'] == RECORD
+
+
+def test_unknown_dictionary_id():
+    with pytest.raises(ValueError, match="Unknown dictionary id"):
+        get_dictionary(0xDEADBEEF)
+
+
+def test_read_samples(tmp_path):
+    path = tmp_path / 'records.jsonl'
+    path.write_bytes(b'\n'.join(SAMPLES[:50]) + b'\n\n')
+    assert read_samples([path], lines=True) == [sample + b'\n' for sample in SAMPLES[:50]]
+    assert len(read_samples([path], lines=True, max_samples=10)) == 10
+    assert read_samples([path]) == [path.read_bytes()]
+
+
+@pytest.mark.skipif(BrotliComp._HAS_DICTIONARY, reason="the binding supports custom dictionaries")
+def test_brotli_dictionary_is_rejected_without_binding_support(dict_id):
+    with pytest.raises(ValueError, match="does not support custom dictionaries"):
+        brotli_compress_bytes(RECORD, dictionary_id=dict_id)
+    with pytest.raises(ValueError, match="does not support custom dictionaries"):
+        get_codec('brotli', dictionary_id=dict_id).compress(RECORD)
+
+
+@pytest.mark.skipif(not BrotliComp._HAS_DICTIONARY, reason="the binding has no custom dictionaries")
+def test_brotli_dictionary_round_trip(dict_id):
+    compressed = brotli_compress_bytes(RECORD, dictionary_id=dict_id)['compressed_bytes']
+    assert brotli_decompress_bytes(compressed, dict_id)['decompressed_bytes'] == RECORD
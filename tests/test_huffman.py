@@ -0,0 +1,182 @@
+import random
+
+import pytest
+
+from huffman_coding import (BLOCK_STREAM_MAGIC, DECODE_TABLE_BITS, build_code_lengths, build_decode_table,
+                            build_huffman_tree, canonical_codes, compress, compress_blocks, compress_bytes,
+                            compress_stream, decode_block, decompress, decompress_blocks, decompress_bytes,
+                            decompress_stream, encode_block, limited_code_lengths)
+
+TEXT = "Строка с CRLF\r\nи одиночным CR\rи LF\n" * 300
+rng = random.Random(5)
+BINARY = bytes(rng.choice(b'\x00\x01\x02abc\xff') for _ in range(50000))
+
+
+def _fibonacci(count):
+    numbers = [1, 1]
+    while len(numbers) < count:
+        numbers.append(numbers[-1] + numbers[-2])
+    return numbers
+
+
+# Частоты Фибоначчи дают самое глубокое дерево: без ограничения длины код доходит до 25 бит
+FIBONACCI_FREQ = {chr(0x430 + i): count for i, count in enumerate(_fibonacci(26))}
+FIBONACCI_TEXT = ''.join(char * count for char, count in FIBONACCI_FREQ.items())
+
+
+def _cost(freq_map, code_lengths):
+    return sum(freq_map[char] * code_lengths[char] for char in freq_map)
+
+
+def _kraft(code_lengths):
+    return sum(2 ** -length for length in code_lengths.values())
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('mode, data', [('text', TEXT.encode('utf-8')), ('bytes', BINARY)])
+def test_block_stream_round_trip(mode, data):
+    # Порции по 7 байт режут символы UTF-8 пополам, блоки по 1000 символов — посреди строк
+    compressed = b''.join(compress_stream(_chunks(data, 7), block_size=1000, mode=mode))
+    assert compressed.startswith(BLOCK_STREAM_MAGIC)
+    assert b''.join(decompress_stream(_chunks(compressed, 13))) == data
+
+
+def test_block_stream_is_incremental():
+    consumed = []
+
+    def chunks():
+        for chunk in _chunks(BINARY, 1000):
+            consumed.append(chunk)
+            yield chunk
+
+    stream = compress_stream(chunks(), block_size=5000)
+    next(stream)
+    next(stream)
+    # Первый блок готов, когда прочитано только его содержимое
+    assert sum(map(len, consumed)) == 5000
+
+
+@pytest.mark.parametrize('mode', ['text', 'bytes'])
+def test_block_files_keep_line_endings(mode, tmp_path):
+    source = tmp_path / 'input.txt'
+    source.write_bytes(TEXT.encode('utf-8'))
+    compress_blocks(source, tmp_path / 'packed.huff', block_size=1000, mode=mode, chunk_size=4096)
+    decompress_blocks(tmp_path / 'packed.huff', tmp_path / 'output.txt')
+    assert (tmp_path / 'output.txt').read_bytes() == source.read_bytes()
+
+
+def test_single_block_files_still_decode(tmp_path):
+    source = tmp_path / 'input.txt'
+    source.write_bytes(TEXT.encode('utf-8'))
+    compress(source, tmp_path / 'old.huff')
+    data = (tmp_path / 'old.huff').read_bytes()
+    assert not data.startswith(BLOCK_STREAM_MAGIC)
+    assert b''.join(decompress_stream([data], mode='text')) == source.read_bytes()
+
+
+def test_truncated_block_stream():
+    compressed = b''.join(compress_stream([BINARY], block_size=10000))
+    with pytest.raises(ValueError):
+        b''.join(decompress_stream([compressed[:-1]]))
+    with pytest.raises(ValueError):
+        b''.join(decompress_stream([compressed + b'\x00\x00']))
+    with pytest.raises(ValueError):
+        b''.join(decompress_stream([BLOCK_STREAM_MAGIC + b'X']))
+
+
+def test_text_block_stream_rejects_invalid_utf8():
+    with pytest.raises(ValueError):
+        b''.join(compress_stream([b'abc\xff'], mode='text'))
+
+
+@pytest.mark.parametrize('max_code_length', [12, 15])
+def test_code_lengths_are_limited(max_code_length):
+    assert max(build_huffman_tree(FIBONACCI_FREQ).code_lengths().values()) > max_code_length
+    code_lengths = build_code_lengths(FIBONACCI_FREQ, max_code_length)
+    assert max(code_lengths.values()) == max_code_length
+    assert _kraft(code_lengths) == 1
+
+
+def test_package_merge_is_optimal():
+    # Без действующего ограничения package-merge совпадает с деревом Хаффмана по цене,
+    # а более жёсткое ограничение никогда не уменьшает цену
+    tree_lengths = build_huffman_tree(FIBONACCI_FREQ).code_lengths()
+    assert _cost(FIBONACCI_FREQ, limited_code_lengths(FIBONACCI_FREQ, 25)) == _cost(FIBONACCI_FREQ, tree_lengths)
+    costs = [_cost(FIBONACCI_FREQ, limited_code_lengths(FIBONACCI_FREQ, limit)) for limit in range(25, 4, -1)]
+    assert costs == sorted(costs)
+
+
+def test_limit_is_raised_for_large_alphabets():
+    freq_map = {chr(0x100 + i): 1 + i % 3 for i in range(300)}
+    code_lengths = limited_code_lengths(freq_map, 4)
+    assert max(code_lengths.values()) == 9
+    assert _kraft(code_lengths) <= 1
+    assert limited_code_lengths({'a': 5}, 4) == {'a': 1}
+
+
+@pytest.mark.parametrize('max_code_length', [12, 15])
+def test_limited_round_trip(max_code_length):
+    block = encode_block(FIBONACCI_TEXT, max_code_length)
+    assert decode_block(block) == FIBONACCI_TEXT
+
+
+def test_long_codes_use_subtables():
+    code_lengths = build_code_lengths(FIBONACCI_FREQ, 15)
+    table_bits, table, subtables = build_decode_table(canonical_codes(code_lengths), code_lengths)
+    assert table_bits == DECODE_TABLE_BITS
+    assert subtables
+    # Каждый префикс длинного кода отмечен в основной таблице пустой записью
+    assert all(table[prefix] == ('', 0, 0) for prefix in subtables)
+
+
+@pytest.mark.parametrize('max_code_length', [12, 15])
+def test_long_codes_round_trip_in_byte_mode(max_code_length):
+    data = b''.join(bytes((i,)) * count for i, count in enumerate(_fibonacci(26)))
+    assert bytes(decompress_bytes(memoryview(compress_bytes(data, max_code_length)))) == data
+
+
+def test_invalid_code_is_rejected():
+    # Единственный символ получает код '0': единичные биты — не код
+    block = encode_block('aaaa')
+    block[-1] = 0xFF
+    with pytest.raises(ValueError, match="Некорректный код"):
+        decode_block(block)
+
+
+def test_truncated_block_is_rejected():
+    block = encode_block(FIBONACCI_TEXT, 12)
+    with pytest.raises(ValueError):
+        decode_block(block[:-10])
+
+
+def test_byte_mode_covers_all_byte_values():
+    data = bytes(range(256)) * 3 + bytes(rng.randrange(256) for _ in range(10000))
+    assert bytes(decompress_bytes(compress_bytes(data))) == data
+    for max_code_length in (8, 15):
+        assert bytes(decompress_bytes(compress_bytes(data, max_code_length))) == data
+    with pytest.raises(ValueError):
+        compress_bytes(data, 16)
+
+
+def test_text_mode_rejects_non_bmp():
+    with pytest.raises(ValueError, match="mode='bytes'"):
+        encode_block("улыбка 😀")
+    assert bytes(decompress_bytes(compress_bytes("улыбка 😀".encode('utf-8')))) == "улыбка 😀".encode('utf-8')
+
+
+@pytest.mark.parametrize('mode', ['text', 'bytes'])
+def test_file_round_trip(mode, tmp_path):
+    data = TEXT.encode('utf-8') if mode == 'text' else bytes(range(256)) * 10
+    source = tmp_path / 'input'
+    source.write_bytes(data)
+    compress(source, tmp_path / 'packed.huff', mode=mode)
+    decompress(tmp_path / 'packed.huff', tmp_path / 'output', mode=mode)
+    assert (tmp_path / 'output').read_bytes() == data
+
+
+def test_empty_input():
+    assert bytes(decompress_bytes(compress_bytes(b''))) == b''
+    assert decode_block(encode_block('')) == ''
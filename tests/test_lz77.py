@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from codec import LZ77Codec
+from lz77 import (COMPRESSION_LEVELS, LEGACY_TOKEN_STREAM_MAGIC, iter_tokens, lz77_compress, lz77_decompress,
+                  lz77_decompress_from_sequence, lz77_decompress_tokens, tokens_to_bytes)
+
+WINDOW_SIZE = 4096
+BUFFER_SIZE = 64
+TEXTS = [
+    "",
+    "a",
+    "abracadabra abracadabra abracadabra",
+    "Привет, мир! Привет, мир!\r\n(1,2,3) ) ( \n" * 20,
+    "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+]
+
+
+@pytest.mark.parametrize('parse', ['greedy', 'lazy', 'optimal'])
+@pytest.mark.parametrize('text', TEXTS)
+def test_round_trip(text, parse):
+    result = lz77_compress(text, WINDOW_SIZE, BUFFER_SIZE, parse=parse, with_tokens=True,
+                           with_sequence=True)
+    assert lz77_decompress(result['compressed_bytes'], WINDOW_SIZE, BUFFER_SIZE)['decompressed_text'] == text
+    assert lz77_decompress_tokens(result['token_bytes'])['decompressed_text'] == text
+    if text:
+        sequence_result = lz77_decompress_from_sequence(result['encoded_sequence'], WINDOW_SIZE, BUFFER_SIZE)
+        assert sequence_result['decompressed_text'] == text
+
+
+def test_tokens_round_trip():
+    triples = [(0, 0, 97), (1, 5, None), (0, 0, 200), (3, 300, 98), (7, 1, None)]
+    assert list(iter_tokens(tokens_to_bytes(triples))) == triples
+
+
+def test_truncated_stream():
+    token_bytes = lz77_compress(TEXTS[3], WINDOW_SIZE, BUFFER_SIZE, with_tokens=True)['token_bytes']
+    with pytest.raises(ValueError, match="обрывается"):
+        lz77_decompress_tokens(token_bytes[:-1] + b'\x80')
+    # Обрыв посреди тройки: после заголовка с длиной нет смещения
+    with pytest.raises(ValueError, match="обрывается"):
+        lz77_decompress_tokens(tokens_to_bytes([(0, 0, 97), (1, 3, None)])[:-1])
+
+
+@pytest.mark.parametrize('triples', [
+    [(0, 0, 97), (2, 3, 98)],  # смещение длиннее уже восстановленных данных
+    [(0, 0, 97), (0, 3, 98)],  # нулевое смещение при ненулевой длине
+])
+def test_bad_offset(triples):
+    with pytest.raises(ValueError):
+        lz77_decompress_tokens(tokens_to_bytes(triples))
+
+
+def test_bad_magic():
+    with pytest.raises(ValueError):
+        lz77_decompress_tokens(b'XXXX\x01\x61')
+
+
+def test_legacy_token_stream():
+    # Первая версия потока: литералы — коды символов, смещения — в символах
+    token_bytes = bytearray(tokens_to_bytes([(0, 0, ord('п')), (0, 0, ord('и')), (2, 4, ord('!'))]))
+    token_bytes[:len(LEGACY_TOKEN_STREAM_MAGIC)] = LEGACY_TOKEN_STREAM_MAGIC
+    assert lz77_decompress_tokens(token_bytes)['decompressed_text'] == "пипипи!"
+
+
+def test_invalid_utf8_is_rejected():
+    with pytest.raises(ValueError):
+        lz77_decompress_tokens(tokens_to_bytes([(0, 0, 0xD0), (0, 0, 0x41)]))
+
+
+def test_sequence_legacy_flag():
+    assert lz77_decompress_from_sequence("(0,0,п) (1,3,р)", WINDOW_SIZE, BUFFER_SIZE,
+                                         legacy=True)['decompressed_text'] == "ппппр"
+    with pytest.raises(ValueError):
+        lz77_decompress_from_sequence("(0,0,п) (1,3,р)", WINDOW_SIZE, BUFFER_SIZE)
+
+
+def test_sequence_is_printable_ascii():
+    # Байты UTF-8 экранируются: поле ввода не может подменить, например, байт A0 из «Р» пробелом
+    text = "Привет, Роман! \\x41 \t\n"
+    sequence = lz77_compress(text, WINDOW_SIZE, BUFFER_SIZE, with_sequence=True)['encoded_sequence']
+    assert all(' ' <= char <= '~' for char in sequence)
+    assert "\\xa0" in sequence
+    assert lz77_decompress_from_sequence(sequence, WINDOW_SIZE, BUFFER_SIZE)['decompressed_text'] == text
+
+
+def test_extras_only_on_request():
+    result = lz77_compress(TEXTS[2], WINDOW_SIZE, BUFFER_SIZE)
+    assert 'token_bytes' not in result and 'encoded_sequence' not in result
+    result = lz77_compress(TEXTS[2], WINDOW_SIZE, BUFFER_SIZE, with_sequence=True)
+    assert 'token_bytes' not in result and 'encoded_sequence' in result
+
+
+def _level_corpus():
+    # Код интерфейса в духе design.py: длинные почти одинаковые строки, где совпадение
+    # длиннее часто начинается внутри уже найденного
+    rng = random.Random(0)
+    styles = ['color: rgb(255, 255, 255);\\nfont: 75 9pt \\"Inter\\";',
+              'border-radius:3px;\\ncolor: rgb(201, 216, 197);\\nfont: 75 9pt \\"Inter\\";',
+              'background-color: rgb(40, 44, 52);\\nborder: 1px solid rgb(80, 80, 80);']
+    lines = []
+    for _ in range(600):
+        name = f"{rng.choice(['label', 'button', 'status', 'spin', 'text', 'layout'])}_{rng.randrange(40)}"
+        kind = rng.randrange(3)
+        if kind == 0:
+            lines.append(f'        self.{name}.setStyleSheet("{rng.choice(styles)}")')
+        elif kind == 1:
+            x, y = rng.randrange(500), rng.randrange(500)
+            lines.append(f'        self.{name}.setGeometry(QtCore.QRect({x}, {y}, 151, 31))')
+        else:
+            lines.append(f'        self.{name}.setObjectName("{name}")')
+    return "\n".join(lines).encode('utf-8')
+
+
+@pytest.mark.parametrize('window_size', [4095, 32767])
+def test_levels_are_monotone(window_size):
+    data = _level_corpus()
+    sizes = [len(LZ77Codec(window_size, 255, level=level).compress(data)) for level in sorted(COMPRESSION_LEVELS)]
+    assert sizes == sorted(sizes, reverse=True)